@@ -0,0 +1,26 @@
+import sys
+from sqlalchemy import inspect
+from app.models import Base
+from app.models.database import engine
+
+
+def main():
+    # create_all() only adds indexes together with new tables, so existing
+    # databases pick up indexes declared on the models here
+    try:
+        with engine.begin() as conn:
+            existing_tables = set(inspect(conn).get_table_names())
+            for table in Base.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+                for index in table.indexes:
+                    print(f"Ensuring {index.name} on {table.name}...")
+                    index.create(conn, checkfirst=True)
+        print("Done")
+    except Exception as e:
+        print("Error:", e)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
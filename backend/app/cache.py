@@ -0,0 +1,164 @@
+"""
+KMRL Train Induction Planning System - In-process caching
+Short-lived memoization for status/health data that is cheap to serve stale.
+"""
+
+import threading
+import time
+from functools import wraps
+
+import orjson
+
+# Optional shared tier across workers
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from .config import settings
+
+
+def ttl_cache(seconds: float):
+    """
+    Memoize a function per positional-argument tuple for `seconds`.
+    Concurrent misses are computed once; other callers wait for the result.
+    The wrapped function gets a `cache_clear()` for explicit invalidation.
+    """
+    def decorator(func):
+        entries = {}
+        lock = threading.Lock()
+
+        @wraps(func)
+        def wrapper(*args):
+            hit = entries.get(args)
+            if hit is not None and hit[0] > time.monotonic():
+                return hit[1]
+            with lock:
+                # Another thread may have refreshed the entry while we waited
+                hit = entries.get(args)
+                now = time.monotonic()
+                if hit is not None and hit[0] > now:
+                    return hit[1]
+                value = func(*args)
+                entries[args] = (now + seconds, value)
+                return value
+
+        wrapper.cache_clear = entries.clear
+        return wrapper
+    return decorator
+
+
+# After a Redis failure, skip it for this long instead of paying the socket
+# timeout on every call; the next call after that reconnects
+REDIS_RETRY_SECONDS = 30
+
+_redis_client = None
+_redis_down_until = 0.0
+_redis_lock = threading.Lock()
+
+
+def get_redis():
+    """Redis client when REDIS_URL is set and reachable, else None"""
+    global _redis_client
+    if not (REDIS_AVAILABLE and settings.redis_url):
+        return None
+    client = _redis_client
+    if client is not None or time.monotonic() < _redis_down_until:
+        return client
+    with _redis_lock:
+        if _redis_client is None and time.monotonic() >= _redis_down_until:
+            try:
+                client = redis.Redis.from_url(settings.redis_url, socket_timeout=1)
+                client.ping()
+                print("✓ Redis cache connected")
+                _redis_client = client
+            except Exception as e:
+                redis_failed(e)
+        return _redis_client
+
+
+def redis_failed(error: Exception):
+    """Drop the Redis client and fall back to in-process caches for a while"""
+    global _redis_client, _redis_down_until
+    _redis_client = None
+    _redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+    print(f"✗ Redis unavailable, using in-process caches for {REDIS_RETRY_SECONDS}s: {error}")
+
+
+def shared_ttl_cache(key: str, seconds: int):
+    """
+    ttl_cache for a zero-argument function whose JSON-able result is kept
+    in Redis under `key`, so all workers share one value and one
+    `cache_clear()`. Without Redis it is a plain in-process ttl_cache.
+    """
+    def decorator(func):
+        local = ttl_cache(seconds)(func)
+        lock = threading.Lock()
+
+        def cached(client):
+            value = client.get(key)
+            return None if value is None else orjson.loads(value)
+
+        @wraps(func)
+        def wrapper():
+            client = get_redis()
+            if client is None:
+                return local()
+            try:
+                value = cached(client)
+                if value is not None:
+                    return value
+                with lock:
+                    value = cached(client)
+                    if value is None:
+                        value = func()
+                        client.setex(key, seconds, orjson.dumps(value))
+                    return value
+            except redis.RedisError as e:
+                redis_failed(e)
+                return local()
+
+        def cache_clear():
+            local.cache_clear()
+            client = get_redis()
+            if client is not None:
+                try:
+                    client.delete(key)
+                except redis.RedisError as e:
+                    redis_failed(e)
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
+# How long a background job's outcome stays queryable
+JOB_STATUS_SECONDS = 3600
+
+
+def set_job_status(job_id: str, status: dict):
+    """
+    Record the JSON-able state of a background job in Redis, so any worker
+    can answer a status poll. Callers only queue jobs when Redis is up.
+    """
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.setex(f"job:{job_id}", JOB_STATUS_SECONDS, orjson.dumps(status))
+    except redis.RedisError as e:
+        redis_failed(e)
+
+
+def get_job_status(job_id: str):
+    """State last recorded for a background job, or None if unknown/expired"""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        value = client.get(f"job:{job_id}")
+    except redis.RedisError as e:
+        redis_failed(e)
+        return None
+    return None if value is None else orjson.loads(value)
@@ -3,20 +3,44 @@ KMRL Train Induction Planning System - FastAPI Backend
 Production-ready API with AI-powered features
 """
 
-from fastapi import FastAPI, Depends, HTTPException, Query, UploadFile, File, Form
+from fastapi import FastAPI, Depends, HTTPException, Query, UploadFile, File, Form, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import select, update, case, func, or_, true, tuple_, bindparam, lambda_stmt
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
-import json
+from itertools import islice
+import asyncio
 import csv
 import io
+import uuid
+import orjson
+
+# Native CSV parser for large uploads
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# C ISO-8601 parser for upload timestamps, falls back to the stdlib
+try:
+    from ciso8601 import parse_datetime as parse_iso_datetime
+except ImportError:
+    parse_iso_datetime = datetime.fromisoformat
 
 from .models import (
     Base, engine, get_db, SessionLocal,
     Train, TrainStatus,
-    FitnessCertificate, Department, CertificateStatus, Criticality,
-    JobCard, JobType, JobStatus, JobPriority,
+    FitnessCertificate, CertificateStatus,
+    JobCard, JobStatus,
     BrandingContract, BrandingPriority, TimeBand, BrandingExposureLog,
     MileageMeter,
     CleaningRecord, CleaningStatus, CleaningType, CleaningBay,
@@ -26,20 +50,49 @@ from .models import (
 )
 from .models.database import init_db, test_connection, get_table_counts
 from .services import MockDataGenerator, TrainInductionOptimizer, AICopilot, FileProcessor
+from .services.file_processor import (
+    UPLOAD_SCHEMAS, TRAIN_STATUSES, DEPARTMENTS, CERTIFICATE_STATUSES, CRITICALITIES,
+    JOB_TYPES, JOB_STATUSES, JOB_PRIORITIES, CLEANING_STATUSES,
+    BRANDING_PRIORITIES, TIME_BANDS,
+)
+from .services.optimizer import compute_plan_stats
 from .services.simulation_service import SimulationService
+from .cache import ttl_cache, shared_ttl_cache, get_redis, set_job_status, get_job_status
 from .config import settings, is_ai_enabled, is_groq_enabled, is_cloudinary_enabled, get_service_status, is_postgresql
+from .schemas import TrainListOut, TrainDetailOut, CertificateListOut, JobCardListOut
 # Local auth
 from .services.auth_service import hash_password, verify_password, create_token, get_current_user, require_role
 
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson - native datetime/numpy support and much faster than json"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
 # Create FastAPI app
 app = FastAPI(
     title="KMRL Train Induction Planning System",
     description="AI-powered train scheduling and optimization for Kochi Metro Rail Limited",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
+# Registered before CORS so 413 responses still carry CORS headers
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized uploads from their Content-Length, before the body is read"""
+    if request.url.path.startswith("/api/upload/"):
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > settings.max_upload_mb * 1024 * 1024:
+            return ORJSONResponse(
+                status_code=413,
+                content={"detail": f"Upload exceeds {settings.max_upload_mb} MB limit"}
+            )
+    return await call_next(request)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -49,12 +102,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON payloads (train listings, plans, dashboard)
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=5)
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
     init_db()
+    # Service flags come from env and can't change while the process runs
+    app.state.flags = {
+        "ai": is_ai_enabled(),
+        "groq": is_groq_enabled(),
+        "cloudinary": is_cloudinary_enabled(),
+        "postgres": is_postgresql()
+    }
     print(f"✓ Database initialized")
-    print(f"✓ AI Features: {'Enabled' if is_ai_enabled() else 'Disabled (set GEMINI_API_KEY)'}")
+    print(f"✓ AI Features: {'Enabled' if app.state.flags['ai'] else 'Disabled (set GEMINI_API_KEY)'}")
 
 # ==================== Health & System ====================
 
@@ -64,31 +127,39 @@ async def root():
         "status": "healthy",
         "service": "KMRL Train Induction Planning System",
         "version": "1.0.0",
-        "ai_enabled": is_ai_enabled(),
-        "timestamp": datetime.utcnow().isoformat()
+        "ai_enabled": app.state.flags["ai"],
+        "timestamp": datetime.utcnow()
     }
 
 @app.get("/api/system/status")
-async def system_status(db: Session = Depends(get_db)):
+def system_status(db: Session = Depends(get_db)):
+    # All three counts in one round-trip
+    counts = db.execute(select(
+        select(func.count(Train.id)).scalar_subquery().label("trains"),
+        select(func.count(NightPlan.id)).where(NightPlan.status == PlanStatus.PROPOSED).scalar_subquery().label("plans"),
+        select(func.count(Alert.id)).where(Alert.is_resolved == False).scalar_subquery().label("alerts"),
+    )).one()
+    
     return {
         "database": "connected",
-        "ai_enabled": is_ai_enabled(),
-        "trains_count": db.query(Train).count(),
-        "active_plans": db.query(NightPlan).filter(NightPlan.status == PlanStatus.PROPOSED).count(),
-        "pending_alerts": db.query(Alert).filter(Alert.is_resolved == False).count(),
+        "ai_enabled": app.state.flags["ai"],
+        "trains_count": counts.trains,
+        "active_plans": counts.plans,
+        "pending_alerts": counts.alerts,
         "config": {
             "depot": settings.default_depot,
             "fleet_size": settings.fleet_size,
             "service_requirement": settings.trains_needed_for_service
         },
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow()
     }
 
 @app.get("/api/system/ai-status")
 async def ai_status():
     """Check AI service status"""
+    ai_enabled = app.state.flags["ai"]
     return {
-        "ai_enabled": is_ai_enabled(),
+        "ai_enabled": ai_enabled,
         "provider": "Google Gemini",
         "features": [
             "Plan Explanations",
@@ -97,12 +168,12 @@ async def ai_status():
             "Data Validation",
             "Daily Briefings",
             "Q&A Support"
-        ] if is_ai_enabled() else [],
-        "message": "AI features active" if is_ai_enabled() else "Set GEMINI_API_KEY environment variable to enable AI features"
+        ] if ai_enabled else [],
+        "message": "AI features active" if ai_enabled else "Set GEMINI_API_KEY environment variable to enable AI features"
     }
 
 @app.get("/api/system/services")
-async def get_services_status(db: Session = Depends(get_db)):
+def get_services_status(db: Session = Depends(get_db)):
     """Get comprehensive status of all external services"""
     db_status = test_connection()
     table_counts = get_table_counts()
@@ -114,34 +185,37 @@ async def get_services_status(db: Session = Depends(get_db)):
             "tables": table_counts
         },
         "features": {
-            "gemini_ai": is_ai_enabled(),
-            "groq_llm": is_groq_enabled(),
-            "cloudinary": is_cloudinary_enabled(),
-            "postgresql": is_postgresql()
+            "gemini_ai": app.state.flags["ai"],
+            "groq_llm": app.state.flags["groq"],
+            "cloudinary": app.state.flags["cloudinary"],
+            "postgresql": app.state.flags["postgres"]
         },
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow()
     }
 
 @app.get("/api/system/database")
-async def get_database_status(db: Session = Depends(get_db)):
+def get_database_status(db: Session = Depends(get_db)):
     """Get database connection status and statistics"""
     db_status = test_connection()
     table_counts = get_table_counts()
     
     return {
         "connection": db_status,
-        "type": "PostgreSQL (Neon)" if is_postgresql() else "SQLite",
+        "type": "PostgreSQL (Neon)" if app.state.flags["postgres"] else "SQLite",
         "tables": table_counts,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow()
     }
 
 # ==================== Authentication (Local Email/Password) ====================
 
 ALLOWED_ROLES = {"admin", "supervisor", "worker"}
 
+# Dialect INSERT with ON CONFLICT support (both backends have it)
+dialect_insert = pg_insert if is_postgresql() else sqlite_insert
+
 
 @app.post("/api/auth/signup")
-async def signup_local(payload: Dict[str, Any], db: Session = Depends(get_db)):
+def signup_local(payload: Dict[str, Any], db: Session = Depends(get_db)):
     email = (payload.get("email") or "").strip().lower()
     password = payload.get("password") or ""
     role = (payload.get("role") or "worker").lower()
@@ -151,21 +225,23 @@ async def signup_local(payload: Dict[str, Any], db: Session = Depends(get_db)):
     if role not in ALLOWED_ROLES:
         raise HTTPException(status_code=400, detail="Invalid role")
 
-    existing = db.query(User).filter(User.email == email).first()
-    if existing:
+    # Uniqueness check and insert in one statement; no row back means the email is taken
+    user = db.scalar(
+        dialect_insert(User)
+        .values(email=email, password_hash=hash_password(password), role=role)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
+    )
+    if user is None:
         raise HTTPException(status_code=400, detail="User already exists")
 
-    user = User(email=email, password_hash=hash_password(password), role=role)
-    db.add(user)
+    response = {"token": create_token(user), "user": user.to_dict()}
     db.commit()
-    db.refresh(user)
-
-    token = create_token(user)
-    return {"token": token, "user": user.to_dict()}
+    return response
 
 
 @app.post("/api/auth/login")
-async def login_local(payload: Dict[str, Any], db: Session = Depends(get_db)):
+def login_local(payload: Dict[str, Any], db: Session = Depends(get_db)):
     email = (payload.get("email") or "").strip().lower()
     password = payload.get("password") or ""
     user = db.query(User).filter(User.email == email).first()
@@ -184,6 +260,7 @@ async def auth_me(current_user: User = Depends(get_current_user)):
 
 @app.post("/api/upload/intelligent")
 async def intelligent_file_upload(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     data_type: str = Form(...),
     store_in_cloudinary: bool = Form(True),
@@ -193,7 +270,7 @@ async def intelligent_file_upload(
     Intelligent file upload with AI-powered data extraction.
     
     - Supports CSV and PDF files
-    - Stores files in Cloudinary (optional)
+    - Stores files in Cloudinary (optional; after the response is sent when Redis is configured)
     - Uses Groq LLM to extract and structure data
     - Automatically saves to database
     
@@ -203,12 +280,34 @@ async def intelligent_file_upload(
     
     content = await file.read()
     
+    storage = None
+    if store_in_cloudinary and processor.cloudinary_enabled:
+        public_id = FileProcessor.cloudinary_public_id(file.filename)
+        if get_redis() is not None:
+            # Archiving doesn't affect parsing, so don't hold the request for it. The
+            # URL is only known once the task runs; clients poll /api/upload/status/{job_id},
+            # which any worker can answer since the job state lives in Redis
+            job_id = uuid.uuid4().hex
+            storage = {"status": "queued", "job_id": job_id, "public_id": public_id}
+            set_job_status(job_id, storage)
+            background_tasks.add_task(
+                processor.upload_to_cloudinary, content, file.filename,
+                public_id=public_id, job_id=job_id
+            )
+        else:
+            # Without Redis a status poll could land on another worker, so store inline
+            stored = await processor.upload_to_cloudinary(content, file.filename, public_id=public_id)
+            if stored:
+                storage = {"status": "stored", "cloudinary_url": stored["url"], "public_id": stored["public_id"]}
+            else:
+                storage = {"status": "failed", "public_id": public_id}
+    
     try:
         result = await processor.process_and_save(
             content=content,
             filename=file.filename,
             data_type=data_type,
-            store_in_cloudinary=store_in_cloudinary
+            store_in_cloudinary=False
         )
     except Exception as e:
         return {
@@ -236,24 +335,34 @@ async def intelligent_file_upload(
     # Safe extraction with defaults
     parsed = result.get("parsed") or {}
     saved = result.get("saved") or {}
-    cloudinary_data = result.get("cloudinary")
+    if data_type == "trains" and saved.get("saved_count"):
+        _depot_layout.cache_clear()
     
     return {
         "status": "success" if parsed.get("success") else "partial",
         "filename": file.filename,
         "data_type": data_type,
-        "file_stored": cloudinary_data is not None,
-        "cloudinary_url": cloudinary_data.get("url") if cloudinary_data else None,
+        "file_stored": storage is not None and storage["status"] == "stored",
+        "cloudinary_url": storage and storage.get("cloudinary_url"),
+        "storage": storage,
         "records_parsed": parsed.get("count", 0),
         "records_saved": saved.get("saved_count", 0),
         "parsing_method": parsed.get("method"),
         "errors": saved.get("errors", []) + (parsed.get("errors", []) if not parsed.get("success") else []),
         "services_used": {
-            "cloudinary": cloudinary_data is not None,
+            "cloudinary": storage is not None,
             "groq_llm": str(parsed.get("method", "")).startswith("groq")
         }
     }
 
+@app.get("/api/upload/status/{job_id}")
+def get_upload_status(job_id: str):
+    """Outcome of a queued Cloudinary archive: queued, stored (with its URL) or failed"""
+    status = get_job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired upload job")
+    return {"job_id": job_id, **status}
+
 @app.post("/api/upload/parse-preview")
 async def parse_file_preview(
     file: UploadFile = File(...),
@@ -298,8 +407,7 @@ async def parse_file_preview(
 @app.get("/api/upload/schema/{data_type}")
 async def get_schema(data_type: str):
     """Get expected schema for a data type"""
-    processor = FileProcessor(None)
-    schema = processor._get_schema(data_type)
+    schema = UPLOAD_SCHEMAS.get(data_type)
     
     if not schema:
         raise HTTPException(status_code=404, detail=f"Unknown data type: {data_type}")
@@ -317,8 +425,109 @@ async def get_schema(data_type: str):
 
 # ==================== Manual Data Upload ====================
 
+def _resolve_trains(db: Session, refs: List[Any]) -> Dict[Any, Any]:
+    """
+    Resolve incoming train references to (id, train_id) rows in a single query.
+    String refs match Train.train_id (e.g. "TS-201"); integer refs match Train.id.
+    """
+    codes = {ref for ref in refs if isinstance(ref, str)}
+    pks = {ref for ref in refs if isinstance(ref, int) and not isinstance(ref, bool)}
+    conditions = []
+    if codes:
+        conditions.append(Train.train_id.in_(codes))
+    if pks:
+        conditions.append(Train.id.in_(pks))
+    if not conditions:
+        return {}
+    
+    resolved = {}
+    for train in db.query(Train.id, Train.train_id).filter(or_(*conditions)):
+        if train.train_id in codes:
+            resolved[train.train_id] = train
+        if train.id in pks:
+            resolved[train.id] = train
+    return resolved
+
+def _resolve_train_ids(db: Session, refs: List[Any]) -> Dict[Any, int]:
+    """Resolve incoming train references to database ids in a single query"""
+    return {ref: train.id for ref, train in _resolve_trains(db, refs).items()}
+
+UPLOAD_BATCH_SIZE = 1000
+# Below this size the csv module wins; pyarrow's setup cost dominates
+PYARROW_MIN_BYTES = 1 << 20
+
+def _stream_csv(file: UploadFile):
+    """Read CSV rows straight from the spooled upload without loading it all into memory"""
+    if PYARROW_AVAILABLE and (file.size or 0) >= PYARROW_MIN_BYTES:
+        return _stream_csv_arrow(file)
+    return csv.DictReader(io.TextIOWrapper(file.file, encoding='utf-8-sig', newline=''))
+
+def _stream_csv_arrow(file: UploadFile):
+    """Parse a large CSV upload with pyarrow, yielding the same str-valued dicts as csv.DictReader"""
+    # Parse the header with the csv module so quoting and a BOM are handled identically
+    text = io.TextIOWrapper(file.file, encoding='utf-8-sig', newline='')
+    header = next(csv.reader(text), [])
+    text.detach()
+    file.file.seek(0)
+    if not header:
+        return
+
+    # pyarrow rejects rows with the wrong column count, and its skipped rows can't be
+    # put back in file order, so any ragged row hands the rest of the file to DictReader
+    ragged = False
+    def on_ragged_row(row):
+        nonlocal ragged
+        ragged = True
+        return 'skip'
+
+    reader = pa_csv.open_csv(
+        file.file,
+        read_options=pa_csv.ReadOptions(block_size=8 << 20),
+        parse_options=pa_csv.ParseOptions(invalid_row_handler=on_ragged_row),
+        # Keep every column as text so row handling matches the csv module
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            strings_can_be_null=False
+        )
+    )
+    yielded = 0
+    for record_batch in reader:
+        # A batch with skipped rows is never emitted
+        if ragged:
+            break
+        yield from record_batch.to_pylist()
+        yielded += record_batch.num_rows
+    reader.close()
+    if not ragged:
+        return
+
+    # Both parsers count records the same way (blank lines skipped), so resume after
+    # the rows pyarrow already produced
+    file.file.seek(0)
+    rows = csv.DictReader(io.TextIOWrapper(file.file, encoding='utf-8-sig', newline=''))
+    yield from islice(rows, yielded, None)
+
+def _batched(items, size: int = UPLOAD_BATCH_SIZE):
+    """Yield successive lists of up to `size` items"""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def _insert_batch(db: Session, model, mappings: List[Dict[str, Any]], key: str) -> List[Any]:
+    """
+    Bulk insert one batch of row mappings and return their identifying values.
+    A duplicate key rolls back the whole request as a 400.
+    """
+    if mappings:
+        try:
+            db.bulk_insert_mappings(model, mappings)
+        except IntegrityError as e:
+            db.rollback()
+            raise HTTPException(status_code=400, detail=f"Rejected {model.__tablename__} batch: {e.orig}")
+    return [m[key] for m in mappings]
+
 @app.post("/api/upload/trains")
-async def upload_trains(
+def upload_trains(
     file: UploadFile = File(None),
     data: str = Form(None),
     db: Session = Depends(get_db)
@@ -327,50 +536,38 @@ async def upload_trains(
     Upload train data via CSV file or JSON.
     CSV columns: train_id, train_number, name, configuration, status, depot_id
     """
-    trains_added = []
-    
     if file:
-        content = await file.read()
-        text = content.decode('utf-8')
-        reader = csv.DictReader(io.StringIO(text))
-        
-        for row in reader:
-            train = Train(
-                train_id=row.get('train_id', f"TS-{row.get('train_number', 0)}"),
-                train_number=int(row.get('train_number', 0)),
-                name=row.get('name', ''),
-                configuration=row.get('configuration', '3-car'),
-                status=TrainStatus(row.get('status', 'active')),
-                depot_id=row.get('depot_id', settings.default_depot),
-                overall_health_score=float(row.get('health_score', 100)),
-                is_service_ready=row.get('status', 'active') == 'active'
-            )
-            db.add(train)
-            trains_added.append(train.train_id)
-    
+        # Stream the CSV instead of buffering the whole upload
+        items = _stream_csv(file)
     elif data:
-        json_data = json.loads(data)
+        json_data = orjson.loads(data)
         items = json_data if isinstance(json_data, list) else [json_data]
-        
-        for item in items:
-            train = Train(
-                train_id=item.get('train_id', f"TS-{item.get('train_number', 0)}"),
-                train_number=int(item.get('train_number', 0)),
-                name=item.get('name', ''),
-                configuration=item.get('configuration', '3-car'),
-                status=TrainStatus(item.get('status', 'active')),
-                depot_id=item.get('depot_id', settings.default_depot),
-                overall_health_score=float(item.get('health_score', 100)),
-                is_service_ready=item.get('status', 'active') == 'active'
-            )
-            db.add(train)
-            trains_added.append(train.train_id)
+    else:
+        items = []
+    
+    train_ids = []
+    for batch in _batched(items):
+        trains = [
+            {
+                "train_id": item.get('train_id', f"TS-{item.get('train_number', 0)}"),
+                "train_number": int(item.get('train_number', 0)),
+                "name": item.get('name', ''),
+                "configuration": item.get('configuration', '3-car'),
+                "status": TRAIN_STATUSES[item.get('status', 'active')],
+                "depot_id": item.get('depot_id', settings.default_depot),
+                "overall_health_score": float(item.get('health_score', 100)),
+                "is_service_ready": item.get('status', 'active') == 'active'
+            }
+            for item in batch
+        ]
+        train_ids += _insert_batch(db, Train, trains, "train_id")
     
     db.commit()
-    return {"status": "success", "trains_added": len(trains_added), "train_ids": trains_added}
+    _depot_layout.cache_clear()
+    return {"status": "success", "trains_added": len(train_ids), "train_ids": train_ids}
 
 @app.post("/api/upload/certificates")
-async def upload_certificates(
+def upload_certificates(
     file: UploadFile = File(None),
     data: str = Form(None),
     db: Session = Depends(get_db)
@@ -379,67 +576,72 @@ async def upload_certificates(
     Upload fitness certificates via CSV or JSON.
     CSV columns: train_id, department, status, valid_from, valid_to, remarks
     """
-    certs_added = []
+    certificate_numbers = []
+    # Defaults are the same for every row of an upload, so compute them once
+    now = datetime.utcnow()
+    default_valid_to = now + timedelta(days=30)
+    default_number = f"CERT-{datetime.now().strftime('%Y%m%d%H%M%S')}"
     
     if file:
-        content = await file.read()
-        text = content.decode('utf-8')
-        reader = csv.DictReader(io.StringIO(text))
-        
-        for row in reader:
-            # Find train by train_id string
-            train = db.query(Train).filter(Train.train_id == row.get('train_id')).first()
-            if not train:
-                continue
+        # Stream the CSV and insert in batches so memory stays bounded
+        for rows in _batched(_stream_csv(file)):
+            # Find trains by train_id string
+            train_map = _resolve_train_ids(db, [row.get('train_id') for row in rows])
+            certs = []
             
-            cert = FitnessCertificate(
-                train_id=train.id,
-                certificate_number=row.get('certificate_number', f"CERT-{datetime.now().strftime('%Y%m%d%H%M%S')}"),
-                department=Department(row.get('department', 'RollingStock')),
-                status=CertificateStatus(row.get('status', 'Valid')),
-                criticality=Criticality(row.get('criticality', 'hard')),
-                valid_from=datetime.fromisoformat(row.get('valid_from', datetime.utcnow().isoformat())),
-                valid_to=datetime.fromisoformat(row.get('valid_to', (datetime.utcnow() + timedelta(days=30)).isoformat())),
-                remarks=row.get('remarks', '')
-            )
-            db.add(cert)
-            certs_added.append(cert.certificate_number)
+            for row in rows:
+                train_id = train_map.get(row.get('train_id'))
+                if not train_id:
+                    continue
+                
+                certs.append({
+                    "train_id": train_id,
+                    "certificate_number": row.get('certificate_number', default_number),
+                    "department": DEPARTMENTS[row.get('department', 'RollingStock')],
+                    "status": CERTIFICATE_STATUSES[row.get('status', 'Valid')],
+                    "criticality": CRITICALITIES[row.get('criticality', 'hard')],
+                    "valid_from": parse_iso_datetime(row['valid_from']) if 'valid_from' in row else now,
+                    "valid_to": parse_iso_datetime(row['valid_to']) if 'valid_to' in row else default_valid_to,
+                    "remarks": row.get('remarks', '')
+                })
+            
+            certificate_numbers += _insert_batch(db, FitnessCertificate, certs, "certificate_number")
     
     elif data:
-        json_data = json.loads(data)
+        json_data = orjson.loads(data)
         items = json_data if isinstance(json_data, list) else [json_data]
+        # Match by train_id string or by database ID
+        train_map = _resolve_train_ids(db, [item.get('train_id') for item in items])
+        certs = []
         
         for item in items:
-            train = db.query(Train).filter(Train.train_id == item.get('train_id')).first()
-            if not train:
-                # Try by ID
-                train = db.query(Train).filter(Train.id == item.get('train_id')).first()
-            if not train:
+            train_id = train_map.get(item.get('train_id'))
+            if not train_id:
                 continue
             
-            cert = FitnessCertificate(
-                train_id=train.id,
-                certificate_number=item.get('certificate_number', f"CERT-{datetime.now().strftime('%Y%m%d%H%M%S')}"),
-                department=Department(item.get('department', 'RollingStock')),
-                status=CertificateStatus(item.get('status', 'Valid')),
-                criticality=Criticality(item.get('criticality', 'hard')),
-                valid_from=datetime.fromisoformat(item.get('valid_from')) if item.get('valid_from') else datetime.utcnow(),
-                valid_to=datetime.fromisoformat(item.get('valid_to')) if item.get('valid_to') else datetime.utcnow() + timedelta(days=30),
-                is_conditional=item.get('is_conditional', False),
-                condition_notes=item.get('condition_notes'),
-                emergency_override=item.get('emergency_override', False),
-                override_approved_by=item.get('override_approved_by'),
-                override_reason=item.get('override_reason'),
-                remarks=item.get('remarks', '')
-            )
-            db.add(cert)
-            certs_added.append(cert.certificate_number)
+            certs.append({
+                "train_id": train_id,
+                "certificate_number": item.get('certificate_number', default_number),
+                "department": DEPARTMENTS[item.get('department', 'RollingStock')],
+                "status": CERTIFICATE_STATUSES[item.get('status', 'Valid')],
+                "criticality": CRITICALITIES[item.get('criticality', 'hard')],
+                "valid_from": parse_iso_datetime(item.get('valid_from')) if item.get('valid_from') else now,
+                "valid_to": parse_iso_datetime(item.get('valid_to')) if item.get('valid_to') else default_valid_to,
+                "is_conditional": item.get('is_conditional', False),
+                "condition_notes": item.get('condition_notes'),
+                "emergency_override": item.get('emergency_override', False),
+                "override_approved_by": item.get('override_approved_by'),
+                "override_reason": item.get('override_reason'),
+                "remarks": item.get('remarks', '')
+            })
+        
+        certificate_numbers += _insert_batch(db, FitnessCertificate, certs, "certificate_number")
     
     db.commit()
-    return {"status": "success", "certificates_added": len(certs_added), "certificate_numbers": certs_added}
+    return {"status": "success", "certificates_added": len(certificate_numbers), "certificate_numbers": certificate_numbers}
 
 @app.post("/api/upload/job-cards")
-async def upload_job_cards(
+def upload_job_cards(
     file: UploadFile = File(None),
     data: str = Form(None),
     db: Session = Depends(get_db)
@@ -448,161 +650,173 @@ async def upload_job_cards(
     Upload job cards (Maximo work orders) via CSV or JSON.
     CSV columns: train_id, job_id, title, job_type, priority, status, safety_critical, due_date
     """
-    jobs_added = []
+    job_ids = []
+    # Defaults are the same for every row of an upload, so compute them once
+    default_job_id = f"WO-{datetime.now().strftime('%Y%m%d%H%M%S')}"
     
     if file:
-        content = await file.read()
-        text = content.decode('utf-8')
-        reader = csv.DictReader(io.StringIO(text))
-        
-        for row in reader:
-            train = db.query(Train).filter(Train.train_id == row.get('train_id')).first()
-            if not train:
-                continue
+        # Stream the CSV and insert in batches so memory stays bounded
+        for rows in _batched(_stream_csv(file)):
+            train_map = _resolve_train_ids(db, [row.get('train_id') for row in rows])
+            jobs = []
             
-            job = JobCard(
-                train_id=train.id,
-                job_id=row.get('job_id', f"WO-{datetime.now().strftime('%Y%m%d%H%M%S')}"),
-                job_type=JobType(row.get('job_type', 'preventive')),
-                priority=JobPriority(int(row.get('priority', 3))),
-                status=JobStatus(row.get('status', 'OPEN')),
-                title=row.get('title', 'Maintenance Task'),
-                description=row.get('description', ''),
-                related_component=row.get('component', ''),
-                safety_critical=row.get('safety_critical', '').lower() in ['true', 'yes', '1', 'y'],
-                due_date=datetime.fromisoformat(row.get('due_date')) if row.get('due_date') else None,
-                estimated_downtime_hours=float(row.get('downtime_hours', 0))
-            )
-            db.add(job)
-            jobs_added.append(job.job_id)
+            for row in rows:
+                train_id = train_map.get(row.get('train_id'))
+                if not train_id:
+                    continue
+                
+                jobs.append({
+                    "train_id": train_id,
+                    "job_id": row.get('job_id', default_job_id),
+                    "job_type": JOB_TYPES[row.get('job_type', 'preventive')],
+                    "priority": JOB_PRIORITIES[int(row.get('priority', 3))],
+                    "status": JOB_STATUSES[row.get('status', 'OPEN')],
+                    "title": row.get('title', 'Maintenance Task'),
+                    "description": row.get('description', ''),
+                    "related_component": row.get('component', ''),
+                    "safety_critical": row.get('safety_critical', '').lower() in ['true', 'yes', '1', 'y'],
+                    "due_date": parse_iso_datetime(row.get('due_date')) if row.get('due_date') else None,
+                    "estimated_downtime_hours": float(row.get('downtime_hours', 0))
+                })
+            
+            job_ids += _insert_batch(db, JobCard, jobs, "job_id")
     
     elif data:
-        json_data = json.loads(data)
+        json_data = orjson.loads(data)
         items = json_data if isinstance(json_data, list) else [json_data]
+        train_map = _resolve_train_ids(db, [item.get('train_id') for item in items])
+        jobs = []
         
         for item in items:
-            train = db.query(Train).filter(Train.train_id == item.get('train_id')).first()
-            if not train:
-                train = db.query(Train).filter(Train.id == item.get('train_id')).first()
-            if not train:
+            train_id = train_map.get(item.get('train_id'))
+            if not train_id:
                 continue
             
-            job = JobCard(
-                train_id=train.id,
-                job_id=item.get('job_id', f"WO-{datetime.now().strftime('%Y%m%d%H%M%S')}"),
-                job_type=JobType(item.get('job_type', 'preventive')),
-                priority=JobPriority(int(item.get('priority', 3))),
-                status=JobStatus(item.get('status', 'OPEN')),
-                title=item.get('title', 'Maintenance Task'),
-                description=item.get('description', ''),
-                related_component=item.get('related_component', item.get('component', '')),
-                safety_critical=item.get('safety_critical', False),
-                blocks_service=item.get('blocks_service', False),
-                requires_ibl=item.get('requires_ibl', False),
-                due_date=datetime.fromisoformat(item.get('due_date')) if item.get('due_date') else None,
-                estimated_downtime_hours=float(item.get('estimated_downtime_hours', item.get('downtime_hours', 0))),
-                parts_available=item.get('parts_available', True)
-            )
-            db.add(job)
-            jobs_added.append(job.job_id)
+            jobs.append({
+                "train_id": train_id,
+                "job_id": item.get('job_id', default_job_id),
+                "job_type": JOB_TYPES[item.get('job_type', 'preventive')],
+                "priority": JOB_PRIORITIES[int(item.get('priority', 3))],
+                "status": JOB_STATUSES[item.get('status', 'OPEN')],
+                "title": item.get('title', 'Maintenance Task'),
+                "description": item.get('description', ''),
+                "related_component": item.get('related_component', item.get('component', '')),
+                "safety_critical": item.get('safety_critical', False),
+                "blocks_service": item.get('blocks_service', False),
+                "requires_ibl": item.get('requires_ibl', False),
+                "due_date": parse_iso_datetime(item.get('due_date')) if item.get('due_date') else None,
+                "estimated_downtime_hours": float(item.get('estimated_downtime_hours', item.get('downtime_hours', 0))),
+                "parts_available": item.get('parts_available', True)
+            })
+        
+        job_ids += _insert_batch(db, JobCard, jobs, "job_id")
     
     db.commit()
-    return {"status": "success", "jobs_added": len(jobs_added), "job_ids": jobs_added}
+    return {"status": "success", "jobs_added": len(job_ids), "job_ids": job_ids}
 
 @app.post("/api/upload/branding")
-async def upload_branding(
+def upload_branding(
     file: UploadFile = File(None),
     data: str = Form(None),
     db: Session = Depends(get_db)
 ):
     """Upload branding contracts via CSV or JSON"""
-    contracts_added = []
+    brands = []
+    # Defaults are the same for every row of an upload, so compute them once
+    now = datetime.utcnow()
+    default_campaign_end = now + timedelta(days=90)
+    default_brand_id = f"BRAND-{datetime.now().strftime('%Y%m%d')}"
     
     if file:
-        content = await file.read()
-        text = content.decode('utf-8')
-        reader = csv.DictReader(io.StringIO(text))
-        
-        for row in reader:
-            train = db.query(Train).filter(Train.train_id == row.get('train_id')).first()
-            if not train:
-                continue
+        # Stream the CSV and insert in batches so memory stays bounded
+        for rows in _batched(_stream_csv(file)):
+            train_map = _resolve_train_ids(db, [row.get('train_id') for row in rows])
+            contracts = []
             
-            contract = BrandingContract(
-                train_id=train.id,
-                brand_id=row.get('brand_id', f"BRAND-{datetime.now().strftime('%Y%m%d')}"),
-                brand_name=row.get('brand_name', 'Unknown Brand'),
-                campaign_name=row.get('campaign_name', ''),
-                campaign_start=datetime.fromisoformat(row.get('campaign_start')) if row.get('campaign_start') else datetime.utcnow(),
-                campaign_end=datetime.fromisoformat(row.get('campaign_end')) if row.get('campaign_end') else datetime.utcnow() + timedelta(days=90),
-                priority=BrandingPriority(row.get('priority', 'silver')),
-                target_exposure_hours_weekly=float(row.get('target_weekly_hours', 50)),
-                target_exposure_hours_monthly=float(row.get('target_monthly_hours', 200)),
-                penalty_per_hour_shortfall=float(row.get('penalty_rate', 100))
-            )
-            db.add(contract)
-            contracts_added.append(contract.brand_name)
+            for row in rows:
+                train_id = train_map.get(row.get('train_id'))
+                if not train_id:
+                    continue
+                
+                contracts.append({
+                    "train_id": train_id,
+                    "brand_id": row.get('brand_id', default_brand_id),
+                    "brand_name": row.get('brand_name', 'Unknown Brand'),
+                    "campaign_name": row.get('campaign_name', ''),
+                    "campaign_start": parse_iso_datetime(row.get('campaign_start')) if row.get('campaign_start') else now,
+                    "campaign_end": parse_iso_datetime(row.get('campaign_end')) if row.get('campaign_end') else default_campaign_end,
+                    "priority": BRANDING_PRIORITIES[row.get('priority', 'silver')],
+                    "target_exposure_hours_weekly": float(row.get('target_weekly_hours', 50)),
+                    "target_exposure_hours_monthly": float(row.get('target_monthly_hours', 200)),
+                    "penalty_per_hour_shortfall": float(row.get('penalty_rate', 100))
+                })
+            
+            brands += _insert_batch(db, BrandingContract, contracts, "brand_name")
     
     elif data:
-        json_data = json.loads(data)
+        json_data = orjson.loads(data)
         items = json_data if isinstance(json_data, list) else [json_data]
+        train_map = _resolve_train_ids(db, [item.get('train_id') for item in items])
+        contracts = []
         
         for item in items:
-            train = db.query(Train).filter(Train.train_id == item.get('train_id')).first()
-            if not train:
-                train = db.query(Train).filter(Train.id == item.get('train_id')).first()
-            if not train:
+            train_id = train_map.get(item.get('train_id'))
+            if not train_id:
                 continue
             
-            contract = BrandingContract(
-                train_id=train.id,
-                brand_id=item.get('brand_id', f"BRAND-{datetime.now().strftime('%Y%m%d')}"),
-                brand_name=item.get('brand_name', 'Unknown Brand'),
-                campaign_name=item.get('campaign_name', ''),
-                campaign_start=datetime.fromisoformat(item.get('campaign_start')) if item.get('campaign_start') else datetime.utcnow(),
-                campaign_end=datetime.fromisoformat(item.get('campaign_end')) if item.get('campaign_end') else datetime.utcnow() + timedelta(days=90),
-                priority=BrandingPriority(item.get('priority', 'silver')),
-                target_exposure_hours_weekly=float(item.get('target_exposure_hours_weekly', item.get('target_weekly_hours', 50))),
-                target_exposure_hours_monthly=float(item.get('target_exposure_hours_monthly', item.get('target_monthly_hours', 200))),
-                current_exposure_hours_week=float(item.get('current_exposure_hours_week', 0)),
-                current_exposure_hours_month=float(item.get('current_exposure_hours_month', 0)),
-                penalty_per_hour_shortfall=float(item.get('penalty_per_hour_shortfall', item.get('penalty_rate', 100))),
-                required_time_band=TimeBand(item.get('required_time_band', 'all_day'))
-            )
-            db.add(contract)
-            contracts_added.append(contract.brand_name)
+            contracts.append({
+                "train_id": train_id,
+                "brand_id": item.get('brand_id', default_brand_id),
+                "brand_name": item.get('brand_name', 'Unknown Brand'),
+                "campaign_name": item.get('campaign_name', ''),
+                "campaign_start": parse_iso_datetime(item.get('campaign_start')) if item.get('campaign_start') else now,
+                "campaign_end": parse_iso_datetime(item.get('campaign_end')) if item.get('campaign_end') else default_campaign_end,
+                "priority": BRANDING_PRIORITIES[item.get('priority', 'silver')],
+                "target_exposure_hours_weekly": float(item.get('target_exposure_hours_weekly', item.get('target_weekly_hours', 50))),
+                "target_exposure_hours_monthly": float(item.get('target_exposure_hours_monthly', item.get('target_monthly_hours', 200))),
+                "current_exposure_hours_week": float(item.get('current_exposure_hours_week', 0)),
+                "current_exposure_hours_month": float(item.get('current_exposure_hours_month', 0)),
+                "penalty_per_hour_shortfall": float(item.get('penalty_per_hour_shortfall', item.get('penalty_rate', 100))),
+                "required_time_band": TIME_BANDS[item.get('required_time_band', 'all_day')]
+            })
+        
+        brands += _insert_batch(db, BrandingContract, contracts, "brand_name")
     
     db.commit()
-    return {"status": "success", "contracts_added": len(contracts_added), "brands": contracts_added}
+    return {"status": "success", "contracts_added": len(brands), "brands": brands}
 
 @app.post("/api/upload/mileage")
-async def upload_mileage(
+def upload_mileage(
     data: str = Form(...),
     db: Session = Depends(get_db)
 ):
     """Upload mileage data for trains"""
     meters_updated = []
-    json_data = json.loads(data)
+    json_data = orjson.loads(data)
     items = json_data if isinstance(json_data, list) else [json_data]
     
+    # Resolve all trains and load their existing meters up front - two queries in total
+    train_map = _resolve_trains(db, [item.get('train_id') for item in items])
+    meters = {}
+    for meter in db.query(MileageMeter).filter(
+        MileageMeter.train_id.in_({train.id for train in train_map.values()}),
+        MileageMeter.component_type == 'train'
+    ):
+        meters.setdefault(meter.train_id, meter)
+    now = datetime.utcnow()
+    
     for item in items:
-        train = db.query(Train).filter(Train.train_id == item.get('train_id')).first()
-        if not train:
-            train = db.query(Train).filter(Train.id == item.get('train_id')).first()
+        train = train_map.get(item.get('train_id'))
         if not train:
             continue
         
-        # Check if meter exists
-        meter = db.query(MileageMeter).filter(
-            MileageMeter.train_id == train.id,
-            MileageMeter.component_type == 'train'
-        ).first()
+        meter = meters.get(train.id)
         
         if meter:
             meter.lifetime_km = float(item.get('lifetime_km', meter.lifetime_km))
             meter.km_since_last_service = float(item.get('km_since_last_service', meter.km_since_last_service))
             meter.km_since_last_overhaul = float(item.get('km_since_last_overhaul', meter.km_since_last_overhaul))
-            meter.updated_at = datetime.utcnow()
+            meter.updated_at = now
         else:
             meter = MileageMeter(
                 train_id=train.id,
@@ -618,31 +832,39 @@ async def upload_mileage(
         
         meters_updated.append(train.train_id)
     
+    # Inserts and updates go out as batched statements on commit
     db.commit()
     return {"status": "success", "meters_updated": len(meters_updated), "trains": meters_updated}
 
 @app.post("/api/upload/cleaning")
-async def upload_cleaning(
+def upload_cleaning(
     data: str = Form(...),
     db: Session = Depends(get_db)
 ):
     """Upload cleaning status for trains"""
     records_updated = []
-    json_data = json.loads(data)
+    json_data = orjson.loads(data)
     items = json_data if isinstance(json_data, list) else [json_data]
     
+    # Resolve all trains and load their existing records up front - two queries in total
+    train_map = _resolve_trains(db, [item.get('train_id') for item in items])
+    records = {}
+    for record in db.query(CleaningRecord).filter(
+        CleaningRecord.train_id.in_({train.id for train in train_map.values()})
+    ):
+        records.setdefault(record.train_id, record)
+    now = datetime.utcnow()
+    
     for item in items:
-        train = db.query(Train).filter(Train.train_id == item.get('train_id')).first()
-        if not train:
-            train = db.query(Train).filter(Train.id == item.get('train_id')).first()
+        train = train_map.get(item.get('train_id'))
         if not train:
             continue
         
-        record = db.query(CleaningRecord).filter(CleaningRecord.train_id == train.id).first()
+        record = records.get(train.id)
         
         if record:
             if item.get('last_cleaned_at'):
-                record.last_cleaned_at = datetime.fromisoformat(item['last_cleaned_at'])
+                record.last_cleaned_at = parse_iso_datetime(item['last_cleaned_at'])
             record.special_clean_required = item.get('special_clean_required', record.special_clean_required)
             record.special_clean_reason = item.get('special_clean_reason', record.special_clean_reason)
             record.vip_inspection_tomorrow = item.get('vip_inspection_tomorrow', record.vip_inspection_tomorrow)
@@ -651,8 +873,8 @@ async def upload_cleaning(
         else:
             record = CleaningRecord(
                 train_id=train.id,
-                status=CleaningStatus(item.get('status', 'ok')),
-                last_cleaned_at=datetime.fromisoformat(item['last_cleaned_at']) if item.get('last_cleaned_at') else datetime.utcnow(),
+                status=CLEANING_STATUSES[item.get('status', 'ok')],
+                last_cleaned_at=parse_iso_datetime(item['last_cleaned_at']) if item.get('last_cleaned_at') else now,
                 special_clean_required=item.get('special_clean_required', False),
                 special_clean_reason=item.get('special_clean_reason'),
                 vip_inspection_tomorrow=item.get('vip_inspection_tomorrow', False),
@@ -662,19 +884,23 @@ async def upload_cleaning(
         
         records_updated.append(train.train_id)
     
+    # Inserts and updates go out as batched statements on commit
     db.commit()
     return {"status": "success", "records_updated": len(records_updated), "trains": records_updated}
 
 # ==================== Mock Data ====================
 
 @app.post("/api/mock-data/generate")
-async def generate_mock_data(
+def generate_mock_data(
     clear_existing: bool = True,
     db: Session = Depends(get_db)
 ):
     """Generate mock fleet data with edge cases for demonstration"""
     generator = MockDataGenerator(db)
     counts = generator.generate_all(clear_existing=clear_existing)
+    _depot_layout.cache_clear()
+    _dashboard_summary.cache_clear()
+    get_table_counts.cache_clear()
     return {
         "status": "success",
         "message": "Mock data generated successfully",
@@ -684,8 +910,16 @@ async def generate_mock_data(
 
 # ==================== Trains ====================
 
-@app.get("/api/trains")
-async def get_trains(
+def _validate_out(model, content: Dict[str, Any]):
+    """Validate ORM rows into a response schema, with one shared `now` for derived fields"""
+    return model.model_validate(content, context={"now": datetime.utcnow()})
+
+def _model_response(out) -> Response:
+    # pydantic-core renders the JSON directly; FastAPI skips its own validation pass
+    return Response(out.model_dump_json(), media_type="application/json")
+
+@app.get("/api/trains", response_model=TrainListOut)
+def get_trains(
     status: Optional[str] = None,
     depot_id: Optional[str] = None,
     db: Session = Depends(get_db)
@@ -693,65 +927,100 @@ async def get_trains(
     query = db.query(Train)
     
     if status:
-        query = query.filter(Train.status == TrainStatus(status))
+        query = query.filter(Train.status == TRAIN_STATUSES[status])
     if depot_id:
         query = query.filter(Train.depot_id == depot_id)
     
-    trains = query.all()
-    return {"trains": [t.to_dict() for t in trains]}
-
-@app.get("/api/trains/{train_id}")
-async def get_train(train_id: int, db: Session = Depends(get_db)):
-    train = db.query(Train).filter(Train.id == train_id).first()
+    return {"trains": query.all()}
+
+def _train_detail(train_id: int, db: Session) -> TrainDetailOut:
+    # Single-row relations are joined into the train query; each collection is one IN query
+    train = db.query(Train).options(
+        joinedload(Train.mileage_meters),
+        joinedload(Train.cleaning_records),
+        joinedload(Train.positions),
+        selectinload(Train.fitness_certificates),
+        selectinload(Train.job_cards.and_(JobCard.status != JobStatus.CLOSED)),
+        selectinload(Train.branding_contracts.and_(BrandingContract.campaign_end > datetime.utcnow())),
+    ).filter(Train.id == train_id).first()
     if not train:
         raise HTTPException(status_code=404, detail="Train not found")
     
-    certificates = db.query(FitnessCertificate).filter(FitnessCertificate.train_id == train_id).all()
-    job_cards = db.query(JobCard).filter(JobCard.train_id == train_id, JobCard.status != JobStatus.CLOSED).all()
-    branding = db.query(BrandingContract).filter(BrandingContract.train_id == train_id, BrandingContract.campaign_end > datetime.utcnow()).all()
-    mileage = db.query(MileageMeter).filter(MileageMeter.train_id == train_id).first()
-    cleaning = db.query(CleaningRecord).filter(CleaningRecord.train_id == train_id).first()
-    position = db.query(TrainPosition).filter(TrainPosition.train_id == train_id).first()
+    mileage = train.mileage_meters[0] if train.mileage_meters else None
+    cleaning = train.cleaning_records[0] if train.cleaning_records else None
+    position = train.positions[0] if train.positions else None
     
-    return {
-        "train": train.to_dict(),
-        "fitness_certificates": [c.to_dict() for c in certificates],
-        "job_cards": [j.to_dict() for j in job_cards],
-        "branding_contracts": [b.to_dict() for b in branding],
+    return _validate_out(TrainDetailOut, {
+        "train": train,
+        "fitness_certificates": train.fitness_certificates,
+        "job_cards": train.job_cards,
+        "branding_contracts": [b.to_dict() for b in train.branding_contracts],
         "mileage": mileage.to_dict() if mileage else None,
         "cleaning": cleaning.to_dict() if cleaning else None,
         "position": position.to_dict() if position else None
+    })
+
+@app.get("/api/trains/{train_id}", response_model=TrainDetailOut)
+def get_train(train_id: int, db: Session = Depends(get_db)):
+    return _model_response(_train_detail(train_id, db))
+
+def _train_row(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values for a new train from request data"""
+    return {
+        "train_id": data.get('train_id', f"TS-{data.get('train_number', 0)}"),
+        "train_number": int(data.get('train_number', 0)),
+        "name": data.get('name', ''),
+        "configuration": data.get('configuration', '3-car'),
+        "manufacturer": data.get('manufacturer', 'Alstom'),
+        "status": TRAIN_STATUSES[data.get('status', 'active')],
+        "depot_id": data.get('depot_id', settings.default_depot),
+        "overall_health_score": float(data.get('overall_health_score', 100)),
+        "is_service_ready": data.get('status', 'active') == 'active',
+        "commissioning_date": _parse_ts(data.get('commissioning_date'))
     }
 
+def _bulk_rows(items: List[Dict[str, Any]], build) -> List[Dict[str, Any]]:
+    """
+    Build insert mappings for a bulk request, rejecting the whole batch
+    with a 400 naming the first bad row instead of inserting part of it.
+    """
+    rows = []
+    for index, item in enumerate(items):
+        try:
+            rows.append(build(item))
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=f"Row {index}: missing or unknown {e}")
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Row {index}: {e}")
+    return rows
+
 @app.post("/api/trains")
-async def create_train(
+def create_train(
     data: Dict[str, Any],
     db: Session = Depends(get_db)
 ):
     """Create a new train"""
-    train = Train(
-        train_id=data.get('train_id', f"TS-{data.get('train_number', 0)}"),
-        train_number=int(data.get('train_number', 0)),
-        name=data.get('name', ''),
-        configuration=data.get('configuration', '3-car'),
-        manufacturer=data.get('manufacturer', 'Alstom'),
-        status=TrainStatus(data.get('status', 'active')),
-        depot_id=data.get('depot_id', settings.default_depot),
-        overall_health_score=float(data.get('overall_health_score', 100)),
-        is_service_ready=data.get('status', 'active') == 'active'
-    )
-    
-    if data.get('commissioning_date'):
-        train.commissioning_date = datetime.fromisoformat(data['commissioning_date'])
+    train = Train(**_train_row(data))
     
     db.add(train)
     db.commit()
+    _depot_layout.cache_clear()
     
     return {"status": "success", "train": train.to_dict()}
 
+@app.post("/api/trains/bulk")
+def create_trains_bulk(items: List[Dict[str, Any]], db: Session = Depends(get_db)):
+    """Create many trains with one executemany INSERT and a single commit"""
+    rows = _bulk_rows(items, _train_row)
+    train_ids = _insert_batch(db, Train, rows, "train_id")
+    db.commit()
+    _depot_layout.cache_clear()
+    
+    return {"status": "success", "trains_added": len(train_ids), "train_ids": train_ids}
+
 @app.put("/api/trains/{train_id}")
-async def update_train(train_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
-    train = db.query(Train).filter(Train.id == train_id).first()
+def update_train(train_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
+    train = db.get(Train, train_id)
     if not train:
         raise HTTPException(status_code=404, detail="Train not found")
     
@@ -759,22 +1028,65 @@ async def update_train(train_id: int, data: Dict[str, Any], db: Session = Depend
     for field in allowed_fields:
         if field in data:
             if field == "status":
-                setattr(train, field, TrainStatus(data[field]))
+                setattr(train, field, TRAIN_STATUSES[data[field]])
             else:
                 setattr(train, field, data[field])
     
     train.updated_at = datetime.utcnow()
     db.commit()
+    _depot_layout.cache_clear()
     
     return {"status": "success", "train": train.to_dict()}
 
+def _train_pk(db: Session, ref: Any) -> Any:
+    """
+    Translate a "TS-xxx" train code to its database id.
+    Database ids, and codes that match no train, are returned unchanged.
+    """
+    if isinstance(ref, str) and ref.startswith('TS-'):
+        return _resolve_train_ids(db, [ref]).get(ref, ref)
+    return ref
+
+def _parse_ts(value: Any, default: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Read an ISO timestamp from request data. datetime values pass through
+    unparsed; missing/empty values give `default`.
+    """
+    if isinstance(value, datetime):
+        return value
+    return parse_iso_datetime(value) if value else default
+
+def _paginate(query, order_by, limit: Optional[int], offset: int):
+    """
+    Apply limit/offset and return (rows, total matching rows).
+    The total comes from COUNT(*) OVER () in the same SELECT, so paging
+    costs one round-trip. A page past the end has no row to carry the
+    total, so only then is a separate COUNT issued.
+    """
+    if limit is None and not offset:
+        rows = query.all()
+        return rows, len(rows)
+    
+    rows = (
+        query.add_columns(func.count().over().label("total"))
+        .order_by(order_by)
+        .limit(limit)
+        .offset(offset)
+        .all()
+    )
+    if not rows:
+        return [], (query.count() if offset else 0)
+    return [row[0] for row in rows], rows[0].total
+
 # ==================== Fitness Certificates ====================
 
-@app.get("/api/fitness-certificates")
-async def get_certificates(
+@app.get("/api/fitness-certificates", response_model=CertificateListOut)
+def get_certificates(
     train_id: Optional[int] = None,
     department: Optional[str] = None,
     status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
     query = db.query(FitnessCertificate)
@@ -782,75 +1094,91 @@ async def get_certificates(
     if train_id:
         query = query.filter(FitnessCertificate.train_id == train_id)
     if department:
-        query = query.filter(FitnessCertificate.department == Department(department))
+        query = query.filter(FitnessCertificate.department == DEPARTMENTS[department])
     if status:
-        query = query.filter(FitnessCertificate.status == CertificateStatus(status))
+        query = query.filter(FitnessCertificate.status == CERTIFICATE_STATUSES[status])
     
-    certs = query.all()
-    return {"certificates": [c.to_dict() for c in certs]}
+    certs, total = _paginate(query, FitnessCertificate.id, limit, offset)
+    return _model_response(_validate_out(CertificateListOut, {"certificates": certs, "total": total}))
+
+def _certificate_row(data: Dict[str, Any], train_db_id: Any, now: datetime) -> Dict[str, Any]:
+    """Column values for a new fitness certificate from request data"""
+    return {
+        "train_id": train_db_id,
+        # Rows of one bulk request share `now`, so the generated number needs a unique suffix
+        "certificate_number": data.get('certificate_number') or f"CERT-{now.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}",
+        "department": DEPARTMENTS[data['department']],
+        "status": CERTIFICATE_STATUSES[data.get('status', 'Valid')],
+        "criticality": CRITICALITIES[data.get('criticality', 'hard')],
+        "valid_from": _parse_ts(data.get('valid_from'), now),
+        "valid_to": _parse_ts(data.get('valid_to'), now + timedelta(days=30)),
+        "is_conditional": data.get('is_conditional', False),
+        "condition_notes": data.get('condition_notes'),
+        "max_speed_restriction": data.get('max_speed_restriction'),
+        "emergency_override": data.get('emergency_override', False),
+        "override_approved_by": data.get('override_approved_by'),
+        "override_reason": data.get('override_reason'),
+        "remarks": data.get('remarks')
+    }
 
 @app.post("/api/fitness-certificates")
-async def create_certificate(data: Dict[str, Any], db: Session = Depends(get_db)):
+def create_certificate(data: Dict[str, Any], db: Session = Depends(get_db)):
     # Support both train_id (database ID) and train_id string
-    train_db_id = data.get('train_id')
-    if isinstance(train_db_id, str) and train_db_id.startswith('TS-'):
-        train = db.query(Train).filter(Train.train_id == train_db_id).first()
-        if train:
-            train_db_id = train.id
+    train_db_id = _train_pk(db, data.get('train_id'))
     
-    cert = FitnessCertificate(
-        train_id=train_db_id,
-        certificate_number=data.get('certificate_number', f"CERT-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"),
-        department=Department(data['department']),
-        status=CertificateStatus(data.get('status', 'Valid')),
-        criticality=Criticality(data.get('criticality', 'hard')),
-        valid_from=datetime.fromisoformat(data['valid_from']) if data.get('valid_from') else datetime.utcnow(),
-        valid_to=datetime.fromisoformat(data['valid_to']) if data.get('valid_to') else datetime.utcnow() + timedelta(days=30),
-        is_conditional=data.get('is_conditional', False),
-        condition_notes=data.get('condition_notes'),
-        max_speed_restriction=data.get('max_speed_restriction'),
-        emergency_override=data.get('emergency_override', False),
-        override_approved_by=data.get('override_approved_by'),
-        override_reason=data.get('override_reason'),
-        remarks=data.get('remarks')
-    )
+    cert = FitnessCertificate(**_certificate_row(data, train_db_id, datetime.utcnow()))
     
     db.add(cert)
     db.commit()
     
     return {"status": "success", "certificate": cert.to_dict()}
 
+@app.post("/api/fitness-certificates/bulk")
+def create_certificates_bulk(items: List[Dict[str, Any]], db: Session = Depends(get_db)):
+    """Create many certificates; train refs are resolved in one query and rows inserted with one commit"""
+    train_map = _resolve_train_ids(db, [item.get('train_id') for item in items])
+    now = datetime.utcnow()
+    
+    rows = _bulk_rows(items, lambda item: _certificate_row(item, train_map[item.get('train_id')], now))
+    certificate_numbers = _insert_batch(db, FitnessCertificate, rows, "certificate_number")
+    db.commit()
+    
+    return {"status": "success", "certificates_added": len(certificate_numbers), "certificate_numbers": certificate_numbers}
+
 @app.put("/api/fitness-certificates/{cert_id}")
-async def update_certificate(cert_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
-    cert = db.query(FitnessCertificate).filter(FitnessCertificate.id == cert_id).first()
+def update_certificate(cert_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
+    cert = db.get(FitnessCertificate, cert_id)
     if not cert:
         raise HTTPException(status_code=404, detail="Certificate not found")
     
+    now = datetime.utcnow()
     if "status" in data:
-        cert.status = CertificateStatus(data["status"])
+        cert.status = CERTIFICATE_STATUSES[data["status"]]
     if "valid_to" in data:
-        cert.valid_to = datetime.fromisoformat(data["valid_to"])
+        cert.valid_to = _parse_ts(data["valid_to"])
     if "emergency_override" in data:
         cert.emergency_override = data["emergency_override"]
         if data["emergency_override"]:
             cert.override_approved_by = data.get("override_approved_by")
             cert.override_reason = data.get("override_reason")
-            cert.override_expires_at = datetime.fromisoformat(data["override_expires_at"]) if data.get("override_expires_at") else datetime.utcnow() + timedelta(hours=12)
+            cert.override_expires_at = _parse_ts(data.get("override_expires_at"), now + timedelta(hours=12))
     if "remarks" in data:
         cert.remarks = data["remarks"]
     
-    cert.updated_at = datetime.utcnow()
+    cert.updated_at = now
     db.commit()
     
     return {"status": "success", "certificate": cert.to_dict()}
 
 # ==================== Job Cards ====================
 
-@app.get("/api/job-cards")
-async def get_job_cards(
+@app.get("/api/job-cards", response_model=JobCardListOut)
+def get_job_cards(
     train_id: Optional[int] = None,
     status: Optional[str] = None,
     safety_critical: Optional[bool] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
     query = db.query(JobCard)
@@ -858,55 +1186,67 @@ async def get_job_cards(
     if train_id:
         query = query.filter(JobCard.train_id == train_id)
     if status:
-        query = query.filter(JobCard.status == JobStatus(status))
+        query = query.filter(JobCard.status == JOB_STATUSES[status])
     if safety_critical is not None:
         query = query.filter(JobCard.safety_critical == safety_critical)
     
-    jobs = query.all()
-    return {"job_cards": [j.to_dict() for j in jobs]}
+    jobs, total = _paginate(query, JobCard.id, limit, offset)
+    return _model_response(_validate_out(JobCardListOut, {"job_cards": jobs, "total": total}))
+
+def _job_card_row(data: Dict[str, Any], train_db_id: Any, now: datetime) -> Dict[str, Any]:
+    """Column values for a new job card from request data"""
+    return {
+        "train_id": train_db_id,
+        "job_id": data.get('job_id') or f"WO-{now.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}",
+        "job_type": JOB_TYPES[data['job_type']],
+        "priority": JOB_PRIORITIES[int(data.get('priority', 3))],
+        "status": JOB_STATUSES[data.get('status', 'OPEN')],
+        "title": data['title'],
+        "description": data.get('description'),
+        "related_component": data.get('related_component'),
+        "due_date": _parse_ts(data.get('due_date')),
+        "estimated_downtime_hours": float(data.get('estimated_downtime_hours', 0)),
+        "safety_critical": data.get('safety_critical', False),
+        "requires_ibl": data.get('requires_ibl', False),
+        "blocks_service": data.get('blocks_service', False),
+        "parts_available": data.get('parts_available', True)
+    }
 
 @app.post("/api/job-cards")
-async def create_job_card(data: Dict[str, Any], db: Session = Depends(get_db)):
-    train_db_id = data.get('train_id')
-    if isinstance(train_db_id, str) and train_db_id.startswith('TS-'):
-        train = db.query(Train).filter(Train.train_id == train_db_id).first()
-        if train:
-            train_db_id = train.id
+def create_job_card(data: Dict[str, Any], db: Session = Depends(get_db)):
+    train_db_id = _train_pk(db, data.get('train_id'))
     
-    job = JobCard(
-        train_id=train_db_id,
-        job_id=data.get('job_id', f"WO-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"),
-        job_type=JobType(data['job_type']),
-        priority=JobPriority(int(data.get('priority', 3))),
-        status=JobStatus(data.get('status', 'OPEN')),
-        title=data['title'],
-        description=data.get('description'),
-        related_component=data.get('related_component'),
-        due_date=datetime.fromisoformat(data['due_date']) if data.get('due_date') else None,
-        estimated_downtime_hours=float(data.get('estimated_downtime_hours', 0)),
-        safety_critical=data.get('safety_critical', False),
-        requires_ibl=data.get('requires_ibl', False),
-        blocks_service=data.get('blocks_service', False),
-        parts_available=data.get('parts_available', True)
-    )
+    job = JobCard(**_job_card_row(data, train_db_id, datetime.utcnow()))
     
     db.add(job)
     db.commit()
     
     return {"status": "success", "job_card": job.to_dict()}
 
+@app.post("/api/job-cards/bulk")
+def create_job_cards_bulk(items: List[Dict[str, Any]], db: Session = Depends(get_db)):
+    """Create many job cards; train refs are resolved in one query and rows inserted with one commit"""
+    train_map = _resolve_train_ids(db, [item.get('train_id') for item in items])
+    now = datetime.utcnow()
+    
+    rows = _bulk_rows(items, lambda item: _job_card_row(item, train_map[item.get('train_id')], now))
+    job_ids = _insert_batch(db, JobCard, rows, "job_id")
+    db.commit()
+    
+    return {"status": "success", "job_cards_added": len(job_ids), "job_ids": job_ids}
+
 @app.put("/api/job-cards/{job_id}")
-async def update_job_card(job_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
-    job = db.query(JobCard).filter(JobCard.id == job_id).first()
+def update_job_card(job_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
+    job = db.get(JobCard, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job card not found")
     
     if "status" in data:
-        job.status = JobStatus(data["status"])
+        job.status = JOB_STATUSES[data["status"]]
     if "priority" in data:
-        job.priority = JobPriority(int(data["priority"]))
+        job.priority = JOB_PRIORITIES[int(data["priority"])]
     if "due_date" in data:
-        job.due_date = datetime.fromisoformat(data["due_date"]) if data["due_date"] else None
+        job.due_date = _parse_ts(data["due_date"])
     if "parts_available" in data:
         job.parts_available = data["parts_available"]
     if "safety_critical" in data:
@@ -920,9 +1260,11 @@ async def update_job_card(job_id: int, data: Dict[str, Any], db: Session = Depen
 # ==================== Branding ====================
 
 @app.get("/api/branding-contracts")
-async def get_branding_contracts(
+def get_branding_contracts(
     train_id: Optional[int] = None,
     active_only: bool = True,
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
     query = db.query(BrandingContract)
@@ -932,24 +1274,21 @@ async def get_branding_contracts(
     if active_only:
         query = query.filter(BrandingContract.campaign_end > datetime.utcnow())
     
-    contracts = query.all()
-    return {"contracts": [c.to_dict() for c in contracts]}
+    contracts, total = _paginate(query, BrandingContract.id, limit, offset)
+    return {"contracts": [c.to_dict() for c in contracts], "total": total}
 
 @app.post("/api/branding-contracts")
-async def create_branding_contract(data: Dict[str, Any], db: Session = Depends(get_db)):
-    train_db_id = data.get('train_id')
-    if isinstance(train_db_id, str) and train_db_id.startswith('TS-'):
-        train = db.query(Train).filter(Train.train_id == train_db_id).first()
-        if train:
-            train_db_id = train.id
+def create_branding_contract(data: Dict[str, Any], db: Session = Depends(get_db)):
+    train_db_id = _train_pk(db, data.get('train_id'))
+    now = datetime.utcnow()
     
     contract = BrandingContract(
         train_id=train_db_id,
-        brand_id=data.get('brand_id', f"BRAND-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"),
+        brand_id=data.get('brand_id', f"BRAND-{now.strftime('%Y%m%d%H%M%S')}"),
         brand_name=data['brand_name'],
         campaign_name=data.get('campaign_name'),
-        campaign_start=datetime.fromisoformat(data['campaign_start']) if data.get('campaign_start') else datetime.utcnow(),
-        campaign_end=datetime.fromisoformat(data['campaign_end']) if data.get('campaign_end') else datetime.utcnow() + timedelta(days=90),
+        campaign_start=_parse_ts(data.get('campaign_start'), now),
+        campaign_end=_parse_ts(data.get('campaign_end'), now + timedelta(days=90)),
         priority=BrandingPriority(data.get('priority', 'silver')),
         target_exposure_hours_weekly=float(data.get('target_exposure_hours_weekly', 50)),
         target_exposure_hours_monthly=float(data.get('target_exposure_hours_monthly', 200)),
@@ -966,9 +1305,11 @@ async def create_branding_contract(data: Dict[str, Any], db: Session = Depends(g
 # ==================== Mileage ====================
 
 @app.get("/api/mileage")
-async def get_mileage(
+def get_mileage(
     train_id: Optional[int] = None,
     near_threshold: bool = False,
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
     query = db.query(MileageMeter)
@@ -978,38 +1319,59 @@ async def get_mileage(
     if near_threshold:
         query = query.filter(MileageMeter.is_near_threshold == True)
     
-    meters = query.all()
-    return {"mileage_data": [m.to_dict() for m in meters]}
+    meters, total = _paginate(query, MileageMeter.id, limit, offset)
+    return {"mileage_data": [m.to_dict() for m in meters], "total": total}
 
 @app.put("/api/mileage/{meter_id}")
-async def update_mileage(meter_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
-    meter = db.query(MileageMeter).filter(MileageMeter.id == meter_id).first()
-    if not meter:
-        raise HTTPException(status_code=404, detail="Mileage meter not found")
+def update_mileage(meter_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
+    # One UPDATE ... RETURNING; the km deltas and threshold flags are computed
+    # in SQL, where every SET expression sees the pre-update row
+    values = {}
+    km_since_service = MileageMeter.km_since_last_service
     
     if "km_today" in data:
-        old_km = meter.km_today
-        meter.km_today = data["km_today"]
-        meter.lifetime_km += (data["km_today"] - old_km)
-        meter.km_since_last_service += (data["km_today"] - old_km)
+        km_today = float(data["km_today"])
+        delta = km_today - MileageMeter.km_today
+        values["km_today"] = km_today
+        values["lifetime_km"] = MileageMeter.lifetime_km + delta
+        km_since_service = MileageMeter.km_since_last_service + delta
     
     if "km_since_last_service" in data:
-        meter.km_since_last_service = data["km_since_last_service"]
+        km_since_service = float(data["km_since_last_service"])
+    
+    # Same as MileageMeter.get_km_to_threshold()
+    km_to_threshold = case(
+        (MileageMeter.service_threshold_km > km_since_service, MileageMeter.service_threshold_km - km_since_service),
+        else_=0
+    )
+    now = datetime.utcnow()
+    values.update(
+        km_since_last_service=km_since_service,
+        is_near_threshold=km_to_threshold < MileageMeter.warning_threshold_km,
+        is_over_threshold=km_to_threshold <= 0,
+        last_reading_at=now,
+        updated_at=now
+    )
     
-    meter.is_near_threshold = meter.get_km_to_threshold() < meter.warning_threshold_km
-    meter.is_over_threshold = meter.get_km_to_threshold() <= 0
-    meter.last_reading_at = datetime.utcnow()
-    meter.updated_at = datetime.utcnow()
+    meter = db.scalars(
+        update(MileageMeter).where(MileageMeter.id == meter_id).values(**values).returning(MileageMeter)
+    ).first()
+    if not meter:
+        raise HTTPException(status_code=404, detail="Mileage meter not found")
+    
+    result = meter.to_dict()
     db.commit()
     
-    return {"status": "success", "mileage": meter.to_dict()}
+    return {"status": "success", "mileage": result}
 
 # ==================== Cleaning ====================
 
 @app.get("/api/cleaning")
-async def get_cleaning_records(
+def get_cleaning_records(
     train_id: Optional[int] = None,
     status: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
     query = db.query(CleaningRecord)
@@ -1017,19 +1379,19 @@ async def get_cleaning_records(
     if train_id:
         query = query.filter(CleaningRecord.train_id == train_id)
     if status:
-        query = query.filter(CleaningRecord.status == CleaningStatus(status))
+        query = query.filter(CleaningRecord.status == CLEANING_STATUSES[status])
     
-    records = query.all()
-    return {"cleaning_records": [r.to_dict() for r in records]}
+    records, total = _paginate(query, CleaningRecord.id, limit, offset)
+    return {"cleaning_records": [r.to_dict() for r in records], "total": total}
 
 @app.put("/api/cleaning/{record_id}")
-async def update_cleaning_record(record_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
-    record = db.query(CleaningRecord).filter(CleaningRecord.id == record_id).first()
+def update_cleaning_record(record_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
+    record = db.get(CleaningRecord, record_id)
     if not record:
         raise HTTPException(status_code=404, detail="Cleaning record not found")
     
     if "last_cleaned_at" in data:
-        record.last_cleaned_at = datetime.fromisoformat(data["last_cleaned_at"])
+        record.last_cleaned_at = _parse_ts(data["last_cleaned_at"])
         record.last_cleaning_type = CleaningType(data.get("cleaning_type", "standard"))
         record.last_cleaned_by = data.get("cleaned_by")
     
@@ -1048,16 +1410,18 @@ async def update_cleaning_record(record_id: int, data: Dict[str, Any], db: Sessi
     return {"status": "success", "cleaning_record": record.to_dict()}
 
 @app.get("/api/cleaning-bays")
-async def get_cleaning_bays(db: Session = Depends(get_db)):
+def get_cleaning_bays(db: Session = Depends(get_db)):
     bays = db.query(CleaningBay).all()
     return {"cleaning_bays": [b.to_dict() for b in bays]}
 
 # ==================== Depot Layout ====================
 
 @app.get("/api/depot/tracks")
-async def get_depot_tracks(
+def get_depot_tracks(
     depot_id: Optional[str] = None,
     track_type: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
     query = db.query(DepotTrack)
@@ -1067,119 +1431,183 @@ async def get_depot_tracks(
     if track_type:
         query = query.filter(DepotTrack.track_type == track_type)
     
-    tracks = query.all()
-    return {"tracks": [t.to_dict() for t in tracks]}
+    tracks, total = _paginate(query, DepotTrack.id, limit, offset)
+    return {"tracks": [t.to_dict() for t in tracks], "total": total}
 
 @app.get("/api/depot/positions")
-async def get_train_positions(db: Session = Depends(get_db)):
-    positions = db.query(TrainPosition).all()
+def get_train_positions(db: Session = Depends(get_db)):
+    # Both relations are many-to-one, so join them into the same SELECT
+    positions = db.query(TrainPosition).options(
+        joinedload(TrainPosition.train),
+        joinedload(TrainPosition.track),
+    ).all()
     
     result = []
     for pos in positions:
-        train = db.query(Train).filter(Train.id == pos.train_id).first()
-        track = db.query(DepotTrack).filter(DepotTrack.id == pos.track_id).first()
-        
         result.append({
             **pos.to_dict(),
-            "train": train.to_dict() if train else None,
-            "track": track.to_dict() if track else None
+            "train": pos.train.to_dict() if pos.train else None,
+            "track": pos.track.to_dict() if pos.track else None
         })
     
     return {"positions": result}
 
 # ==================== Optimization & Planning ====================
 
+def _trains_by_id(db: Session, train_ids) -> Dict[int, Train]:
+    """Load the given trains with one IN query, keyed by database id"""
+    ids = set(train_ids)
+    if not ids:
+        return {}
+    return {t.id: t for t in db.query(Train).filter(Train.id.in_(ids)).all()}
+
+def _generate_plan_explanation(plan_id: int):
+    """
+    Background task: write the AI explanation for a newly generated plan.
+    Plain def so Starlette runs it in the threadpool; the DB work and the
+    blocking Gemini call stay off the event loop.
+    """
+    db = SessionLocal()
+    try:
+        plan = db.get(NightPlan, plan_id)
+        if plan is None:
+            print(f"AI explanation skipped: plan {plan_id} no longer exists")
+            return
+        
+        assignments = [a.to_dict() for a in plan.assignments]
+        trains = _trains_by_id(db, [a['train_id'] for a in assignments])
+        for a in assignments:
+            train = trains.get(a['train_id'])
+            a['train'] = train.to_dict() if train else None
+        
+        plan.ai_explanation = asyncio.run(AICopilot(db).generate_plan_explanation(plan, assignments))
+        db.commit()
+        # The cached dashboard summary carries latest_plan.ai_explanation
+        _dashboard_summary.cache_clear()
+    except Exception as e:
+        print(f"AI explanation generation failed: {e}")
+    finally:
+        db.close()
+
 @app.post("/api/plans/generate")
-async def generate_plan(
+def generate_plan(
+    background_tasks: BackgroundTasks,
     plan_date: Optional[str] = None,
     generate_explanation: bool = True,
     db: Session = Depends(get_db)
 ):
-    """Generate a new induction plan with AI-powered explanations"""
+    """
+    Generate a new induction plan. The AI explanation is written in the
+    background; poll /api/plans/{plan_id}/explanation for it.
+    """
     optimizer = TrainInductionOptimizer(db)
     
-    date = datetime.fromisoformat(plan_date) if plan_date else datetime.utcnow() + timedelta(days=1)
+    date = _parse_ts(plan_date, datetime.utcnow() + timedelta(days=1))
     
     plan = optimizer.optimize(plan_date=date)
+    _dashboard_summary.cache_clear()
     
-    # Generate AI explanation if enabled
-    ai_explanation = None
-    if generate_explanation and is_ai_enabled():
-        try:
-            copilot = AICopilot(db)
-            assignments = [a.to_dict() for a in plan.assignments]
-            for a in assignments:
-                train = db.query(Train).filter(Train.id == a['train_id']).first()
-                a['train'] = train.to_dict() if train else None
-            
-            ai_explanation = await copilot.generate_plan_explanation(plan, assignments)
-            plan.ai_explanation = ai_explanation
-            db.commit()
-        except Exception as e:
-            print(f"AI explanation generation failed: {e}")
+    explanation_pending = generate_explanation and app.state.flags["ai"]
+    if explanation_pending:
+        background_tasks.add_task(_generate_plan_explanation, plan.id)
     
     return {
         "status": "success",
         "plan": plan.to_dict(),
         "assignments": [a.to_dict() for a in plan.assignments],
         "alerts": [a.to_dict() for a in plan.alerts],
-        "ai_explanation": ai_explanation
+        "ai_explanation": None,
+        "ai_explanation_pending": explanation_pending
     }
 
 @app.get("/api/plans")
-async def get_plans(
+def get_plans(
     status: Optional[str] = None,
-    limit: int = 10,
+    limit: int = Query(10, ge=1),
+    cursor: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
+    """
+    List plans newest first. Pass the returned next_cursor back as `cursor`
+    to fetch the next page (keyset pagination, no OFFSET scan). As with
+    alerts, the keyset is (created_at, id) and the cursor is a plan id.
+    """
     query = db.query(NightPlan)
     
     if status:
         query = query.filter(NightPlan.status == PlanStatus(status))
+    if cursor:
+        query = query.filter(
+            tuple_(NightPlan.created_at, NightPlan.id)
+            < tuple_(select(NightPlan.created_at).where(NightPlan.id == cursor).scalar_subquery(), cursor)
+        )
     
-    plans = query.order_by(NightPlan.created_at.desc()).limit(limit).all()
-    return {"plans": [p.to_dict() for p in plans]}
+    plans = query.order_by(NightPlan.created_at.desc(), NightPlan.id.desc()).limit(limit).all()
+    return {
+        "plans": [p.to_dict() for p in plans],
+        "next_cursor": plans[-1].id if len(plans) == limit else None
+    }
+
+# The fields of PlanAssignment.to_dict(), selected as plain rows rather than ORM entities
+PLAN_ASSIGNMENT_COLUMNS = (
+    PlanAssignment.id, PlanAssignment.plan_id, PlanAssignment.train_id,
+    PlanAssignment.assignment_type, PlanAssignment.service_rank,
+    PlanAssignment.assigned_track, PlanAssignment.assigned_position,
+    PlanAssignment.planned_departure_time, PlanAssignment.ibl_tasks,
+    PlanAssignment.estimated_ibl_duration_hours, PlanAssignment.assigned_bay,
+    PlanAssignment.fitness_score, PlanAssignment.maintenance_score,
+    PlanAssignment.branding_score, PlanAssignment.mileage_score,
+    PlanAssignment.cleaning_score, PlanAssignment.shunting_score,
+    PlanAssignment.overall_score, PlanAssignment.is_manual_override,
+    PlanAssignment.override_by, PlanAssignment.override_reason,
+    PlanAssignment.assignment_reason, PlanAssignment.ai_explanation,
+    PlanAssignment.created_at, PlanAssignment.updated_at
+)
 
 @app.get("/api/plans/{plan_id}")
-async def get_plan(plan_id: int, db: Session = Depends(get_db)):
-    plan = db.query(NightPlan).filter(NightPlan.id == plan_id).first()
+def get_plan(plan_id: int, db: Session = Depends(get_db)):
+    plan = db.get(NightPlan, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
     
-    assignments = db.query(PlanAssignment).filter(PlanAssignment.plan_id == plan_id).all()
-    alerts = db.query(Alert).filter(Alert.plan_id == plan_id).all()
+    # Read-only rows: skip ORM instance construction and identity-map bookkeeping
+    assignments = db.execute(
+        select(*PLAN_ASSIGNMENT_COLUMNS).where(PlanAssignment.plan_id == plan_id)
+    ).all()
+    alerts = db.execute(select(*ALERT_COLUMNS).where(Alert.plan_id == plan_id)).all()
     
+    trains = _trains_by_id(db, [a.train_id for a in assignments])
     enriched_assignments = []
     for a in assignments:
-        train = db.query(Train).filter(Train.id == a.train_id).first()
+        train = trains.get(a.train_id)
         enriched_assignments.append({
-            **a.to_dict(),
+            **a._asdict(),
             "train": train.to_dict() if train else None
         })
     
     return {
         "plan": plan.to_dict(),
         "assignments": enriched_assignments,
-        "alerts": [a.to_dict() for a in alerts]
+        "alerts": [a._asdict() for a in alerts]
     }
 
 @app.get("/api/plans/{plan_id}/explanation")
-async def get_plan_explanation(plan_id: int, regenerate: bool = False, db: Session = Depends(get_db)):
+def get_plan_explanation(plan_id: int, regenerate: bool = False, db: Session = Depends(get_db)):
     """Get or generate AI explanation for a plan"""
-    plan = db.query(NightPlan).filter(NightPlan.id == plan_id).first()
+    plan = db.get(NightPlan, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
     
     if plan.ai_explanation and not regenerate:
         return {"explanation": plan.ai_explanation, "source": "cached"}
     
-    if not is_ai_enabled():
+    if not app.state.flags["ai"]:
         return {
             "explanation": "AI explanations require GEMINI_API_KEY to be configured.",
             "source": "disabled"
         }
     
-    copilot = AICopilot(db)
+    copilot = AICopilot(db, use_cache=not regenerate)
     explanation = copilot.explain_plan(plan_id)
     
     plan.ai_explanation = explanation
@@ -1188,29 +1616,49 @@ async def get_plan_explanation(plan_id: int, regenerate: bool = False, db: Sessi
     return {"explanation": explanation, "source": "generated"}
 
 @app.put("/api/plans/{plan_id}/approve")
-async def approve_plan(plan_id: int, approved_by: str, db: Session = Depends(get_db)):
-    plan = db.query(NightPlan).filter(NightPlan.id == plan_id).first()
+def approve_plan(plan_id: int, approved_by: str, db: Session = Depends(get_db)):
+    plan = db.get(NightPlan, plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
     
     plan.status = PlanStatus.APPROVED
     plan.approved_by = approved_by
-    plan.approved_at = datetime.utcnow()
-    plan.updated_at = datetime.utcnow()
+    now = datetime.utcnow()
+    plan.approved_at = now
+    plan.updated_at = now
     
     db.commit()
+    _dashboard_summary.cache_clear()
     
     return {"status": "success", "plan": plan.to_dict()}
 
 @app.post("/api/plans/{plan_id}/override")
-async def override_assignment(plan_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
-    plan = db.query(NightPlan).filter(NightPlan.id == plan_id).first()
-    if not plan:
+def override_assignment(plan_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
+    # Write straight through with UPDATE ... RETURNING instead of loading the
+    # plan and assignment first; nothing is committed if either is missing
+    plan_updated = db.execute(
+        update(NightPlan)
+        .where(NightPlan.id == plan_id)
+        .values(status=PlanStatus.MODIFIED, updated_at=datetime.utcnow())
+    ).rowcount
+    if not plan_updated:
         raise HTTPException(status_code=404, detail="Plan not found")
     
-    assignment = db.query(PlanAssignment).filter(
-        PlanAssignment.plan_id == plan_id,
-        PlanAssignment.train_id == data["train_id"]
+    assignment = db.scalars(
+        update(PlanAssignment)
+        .where(
+            PlanAssignment.plan_id == plan_id,
+            PlanAssignment.train_id == data["train_id"]
+        )
+        .values(
+            is_manual_override=True,
+            override_by=data["override_by"],
+            override_reason=data["reason"],
+            # SET expressions see the pre-update row
+            original_assignment=PlanAssignment.assignment_type,
+            assignment_type=AssignmentType(data["new_assignment"])
+        )
+        .returning(PlanAssignment)
     ).first()
     
     if not assignment:
@@ -1220,7 +1668,7 @@ async def override_assignment(plan_id: int, data: Dict[str, Any], db: Session =
         plan_id=plan_id,
         assignment_id=assignment.id,
         train_id=data["train_id"],
-        original_assignment=assignment.assignment_type.value,
+        original_assignment=assignment.original_assignment,
         new_assignment=data["new_assignment"],
         override_by=data["override_by"],
         override_role=data.get("override_role"),
@@ -1229,23 +1677,16 @@ async def override_assignment(plan_id: int, data: Dict[str, Any], db: Session =
     )
     db.add(override_log)
     
-    assignment.is_manual_override = True
-    assignment.override_by = data["override_by"]
-    assignment.override_reason = data["reason"]
-    assignment.original_assignment = assignment.assignment_type.value
-    assignment.assignment_type = AssignmentType(data["new_assignment"])
-    
-    plan.status = PlanStatus.MODIFIED
-    plan.updated_at = datetime.utcnow()
-    
+    # Serialize before commit expires the RETURNING-loaded row
+    result = assignment.to_dict()
     db.commit()
     
-    return {"status": "success", "assignment": assignment.to_dict()}
+    return {"status": "success", "assignment": result}
 
 # ==================== What-If Scenarios ====================
 
 @app.post("/api/scenarios/run")
-async def run_scenario(data: Dict[str, Any], db: Session = Depends(get_db)):
+def run_scenario(data: Dict[str, Any], db: Session = Depends(get_db)):
     optimizer = TrainInductionOptimizer(db)
     
     scenario = {
@@ -1259,29 +1700,36 @@ async def run_scenario(data: Dict[str, Any], db: Session = Depends(get_db)):
     plan = optimizer.optimize(scenario_overrides=scenario)
     
     baseline = None
+    comparison = None
     if data.get("baseline_plan_id"):
-        baseline = db.query(NightPlan).filter(NightPlan.id == data["baseline_plan_id"]).first()
+        baseline = db.get(NightPlan, data["baseline_plan_id"])
+    if baseline:
+        # Compare live assignment counts rather than the stored summary fields
+        stats = compute_plan_stats(db, [plan.id, baseline.id])
+        empty = {"in_service": 0, "ibl": 0}
+        scenario_stats, baseline_stats = stats.get(plan.id, empty), stats.get(baseline.id, empty)
+        comparison = {
+            "service_change": scenario_stats["in_service"] - baseline_stats["in_service"],
+            "ibl_change": scenario_stats["ibl"] - baseline_stats["ibl"]
+        }
     
     return {
         "status": "success",
         "scenario_plan": plan.to_dict(),
         "assignments": [a.to_dict() for a in plan.assignments],
         "baseline_plan": baseline.to_dict() if baseline else None,
-        "comparison": {
-            "service_change": plan.trains_in_service - (baseline.trains_in_service if baseline else 0),
-            "ibl_change": plan.trains_ibl - (baseline.trains_ibl if baseline else 0)
-        } if baseline else None
+        "comparison": comparison
     }
 
 # ==================== Simulation Tool ====================
 
 @app.get("/api/simulation/stations")
-async def get_simulation_stations(db: Session = Depends(get_db)):
+def get_simulation_stations():
     """Get list of KMRL stations for simulation"""
-    simulator = SimulationService(db)
+    stations = SimulationService.get_station_list()
     return {
-        "stations": simulator.get_station_list(),
-        "total_stations": len(simulator.stations),
+        "stations": stations,
+        "total_stations": len(stations),
         "route_length_km": 31.0
     }
 
@@ -1404,17 +1852,24 @@ async def run_shunting_simulation(data: Dict[str, Any], db: Session = Depends(ge
     result = await simulator.run_shunting_simulation(params)
     return result
 
+@ttl_cache(30)
+def _depot_layout() -> Dict[str, Any]:
+    """Depot layout for the visualizer (cached for 30s, cleared when trains change)"""
+    db = SessionLocal()
+    try:
+        return SimulationService(db).get_depot_layout()
+    finally:
+        db.close()
+
 @app.get("/api/simulation/depot-layout")
-async def get_depot_layout(db: Session = Depends(get_db)):
+def get_depot_layout():
     """
     Get current depot layout and train positions for visualization.
     """
-    simulator = SimulationService(db)
-    layout = simulator.get_depot_layout()
-    return {"layout": layout, "timestamp": datetime.utcnow().isoformat()}
+    return {"layout": _depot_layout(), "timestamp": datetime.utcnow()}
 
 @app.get("/api/simulation/branding-contracts")
-async def get_active_branding_contracts(db: Session = Depends(get_db)):
+def get_active_branding_contracts(db: Session = Depends(get_db)):
     """
     Get active branding contracts for simulation selection.
     """
@@ -1428,15 +1883,10 @@ async def get_active_branding_contracts(db: Session = Depends(get_db)):
 
 # ==================== AI Copilot ====================
 
-@app.post("/api/copilot/chat")
-async def copilot_chat(data: Dict[str, Any], db: Session = Depends(get_db)):
-    copilot = AICopilot(db)
-    
-    message = data.get("message", "")
-    context = data.get("context", {})
-    
+def _chat_context(db: Session, context: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach train, score, plan and assignment details referenced by a chat context"""
     if "train_id" in context:
-        train = db.query(Train).filter(Train.id == context["train_id"]).first()
+        train = db.get(Train, context["train_id"])
         if train:
             context["train"] = train.to_dict()
             
@@ -1445,7 +1895,7 @@ async def copilot_chat(data: Dict[str, Any], db: Session = Depends(get_db)):
             context["scores"] = scores.get(train.id, {})
     
     if "plan_id" in context:
-        plan = db.query(NightPlan).filter(NightPlan.id == context["plan_id"]).first()
+        plan = db.get(NightPlan, context["plan_id"])
         if plan:
             context["plan"] = plan.to_dict()
             
@@ -1457,20 +1907,30 @@ async def copilot_chat(data: Dict[str, Any], db: Session = Depends(get_db)):
                 if assignment:
                     context["assignment"] = assignment.to_dict()
     
+    return context
+
+@app.post("/api/copilot/chat")
+async def copilot_chat(data: Dict[str, Any], db: Session = Depends(get_db)):
+    copilot = AICopilot(db)
+    
+    message = data.get("message", "")
+    # Blocking lookups and scoring run in the threadpool, not on the event loop
+    context = await run_in_threadpool(_chat_context, db, data.get("context", {}))
+    
     # Use async method directly
     response = await copilot.answer_question(message, context)
     
     return {
         "response": response,
         "ai_enabled": copilot.ai_enabled,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow()
     }
 
 @app.post("/api/copilot/explain-plan")
 async def explain_plan_endpoint(plan_id: int, db: Session = Depends(get_db)):
     copilot = AICopilot(db)
     
-    plan = db.query(NightPlan).filter(NightPlan.id == plan_id).first()
+    plan = db.get(NightPlan, plan_id)
     if not plan:
         return {"explanation": "Plan not found.", "plan_id": plan_id, "ai_enabled": copilot.ai_enabled}
     
@@ -1478,9 +1938,10 @@ async def explain_plan_endpoint(plan_id: int, db: Session = Depends(get_db)):
         PlanAssignment.plan_id == plan_id
     ).all()
     
+    trains = _trains_by_id(db, [a.train_id for a in assignments])
     assignment_dicts = []
     for a in assignments:
-        train = db.query(Train).filter(Train.id == a.train_id).first()
+        train = trains.get(a.train_id)
         assignment_dicts.append({
             **a.to_dict(),
             'train': train.to_dict() if train else None
@@ -1503,8 +1964,6 @@ async def explain_assignment(data: Dict[str, Any], db: Session = Depends(get_db)
     train_id = data.get("train_id")
     plan_id = data.get("plan_id")
     
-    train_data = await get_train(train_id, db)
-    
     assignment = None
     if plan_id:
         assignment = db.query(PlanAssignment).filter(
@@ -1515,6 +1974,10 @@ async def explain_assignment(data: Dict[str, Any], db: Session = Depends(get_db)
     if not assignment:
         return {"explanation": "No assignment found for this train in the specified plan."}
     
+    # Only assemble the full train detail once there is something to explain
+    train_detail = await run_in_threadpool(_train_detail, train_id, db)
+    train_data = train_detail.model_dump(mode="json")
+    
     explanation = await copilot.generate_assignment_explanation(assignment.to_dict(), train_data)
     
     return {
@@ -1566,147 +2029,216 @@ async def validate_data_entry(data: Dict[str, Any], db: Session = Depends(get_db
 
 # ==================== Alerts ====================
 
+# The fields of Alert.to_dict(), selected as plain rows rather than ORM entities
+ALERT_COLUMNS = (
+    Alert.id, Alert.plan_id, Alert.train_id, Alert.alert_type, Alert.severity,
+    Alert.title, Alert.message, Alert.related_entity, Alert.related_entity_id,
+    Alert.is_acknowledged, Alert.acknowledged_by, Alert.is_resolved,
+    Alert.resolved_by, Alert.created_at, Alert.expires_at
+)
+
 @app.get("/api/alerts")
-async def get_alerts(
+def get_alerts(
     plan_id: Optional[int] = None,
     train_id: Optional[int] = None,
     severity: Optional[str] = None,
     resolved: Optional[bool] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Alert)
+    """
+    List alerts newest first. With `limit`, pass the returned next_cursor
+    back as `cursor` for the next page. Alerts raised by one plan share a
+    timestamp, so the keyset is (created_at, id) and the cursor is an alert id.
+    """
+    # Lambda statements are cached per filter combination, so repeat polls skip building the SELECT
+    stmt = lambda_stmt(lambda: select(*ALERT_COLUMNS))
     
     if plan_id:
-        query = query.filter(Alert.plan_id == plan_id)
+        stmt += lambda s: s.where(Alert.plan_id == plan_id)
     if train_id:
-        query = query.filter(Alert.train_id == train_id)
+        stmt += lambda s: s.where(Alert.train_id == train_id)
     if severity:
-        query = query.filter(Alert.severity == AlertSeverity(severity))
+        severity_value = AlertSeverity(severity)
+        stmt += lambda s: s.where(Alert.severity == severity_value)
     if resolved is not None:
-        query = query.filter(Alert.is_resolved == resolved)
+        stmt += lambda s: s.where(Alert.is_resolved == resolved)
+    if cursor:
+        stmt += lambda s: s.where(
+            tuple_(Alert.created_at, Alert.id)
+            < tuple_(select(Alert.created_at).where(Alert.id == cursor).scalar_subquery(), cursor)
+        )
     
-    alerts = query.order_by(Alert.created_at.desc()).all()
-    return {"alerts": [a.to_dict() for a in alerts]}
+    stmt += lambda s: s.order_by(Alert.created_at.desc(), Alert.id.desc())
+    if limit is not None:
+        stmt += lambda s: s.limit(limit)
+    alerts = db.execute(stmt).all()
+    return {
+        "alerts": [a._asdict() for a in alerts],
+        "next_cursor": alerts[-1].id if limit and len(alerts) == limit else None
+    }
 
 @app.put("/api/alerts/{alert_id}/acknowledge")
-async def acknowledge_alert(alert_id: int, acknowledged_by: str, db: Session = Depends(get_db)):
-    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+def acknowledge_alert(alert_id: int, acknowledged_by: str, db: Session = Depends(get_db)):
+    alert = db.scalars(
+        update(Alert).where(Alert.id == alert_id).values(
+            is_acknowledged=True,
+            acknowledged_by=acknowledged_by,
+            acknowledged_at=datetime.utcnow()
+        ).returning(Alert)
+    ).first()
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
-    alert.is_acknowledged = True
-    alert.acknowledged_by = acknowledged_by
-    alert.acknowledged_at = datetime.utcnow()
-    
+    result = alert.to_dict()
     db.commit()
     
-    return {"status": "success", "alert": alert.to_dict()}
+    return {"status": "success", "alert": result}
 
 @app.put("/api/alerts/{alert_id}/resolve")
-async def resolve_alert(alert_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
-    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+def resolve_alert(alert_id: int, data: Dict[str, Any], db: Session = Depends(get_db)):
+    alert = db.scalars(
+        update(Alert).where(Alert.id == alert_id).values(
+            is_resolved=True,
+            resolved_by=data.get("resolved_by"),
+            resolved_at=datetime.utcnow(),
+            resolution_notes=data.get("resolution_notes")
+        ).returning(Alert)
+    ).first()
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
-    alert.is_resolved = True
-    alert.resolved_by = data.get("resolved_by")
-    alert.resolved_at = datetime.utcnow()
-    alert.resolution_notes = data.get("resolution_notes")
-    
+    result = alert.to_dict()
     db.commit()
+    _dashboard_summary.cache_clear()
     
-    return {"status": "success", "alert": alert.to_dict()}
+    return {"status": "success", "alert": result}
 
 # ==================== Dashboard Stats ====================
 
-@app.get("/api/dashboard/summary")
-async def get_dashboard_summary(db: Session = Depends(get_db)):
-    total_trains = db.query(Train).count()
-    active_trains = db.query(Train).filter(Train.status == TrainStatus.ACTIVE).count()
-    
-    expired_certs = db.query(FitnessCertificate).filter(
-        FitnessCertificate.status == CertificateStatus.EXPIRED
-    ).count()
-    expiring_certs = db.query(FitnessCertificate).filter(
-        FitnessCertificate.status == CertificateStatus.EXPIRING_SOON
-    ).count()
-    
-    open_jobs = db.query(JobCard).filter(
-        JobCard.status.in_([JobStatus.OPEN, JobStatus.IN_PROGRESS])
-    ).count()
-    safety_critical_jobs = db.query(JobCard).filter(
-        JobCard.safety_critical == True,
-        JobCard.status != JobStatus.CLOSED
-    ).count()
-    
-    active_contracts = db.query(BrandingContract).filter(
-        BrandingContract.campaign_end > datetime.utcnow()
-    ).count()
-    
-    at_risk_branding = db.query(BrandingContract).filter(
-        BrandingContract.campaign_end > datetime.utcnow(),
-        BrandingContract.is_compliant == False
-    ).count()
-    
-    cleaning_overdue = db.query(CleaningRecord).filter(
-        CleaningRecord.status == CleaningStatus.OVERDUE
-    ).count()
-    
-    unresolved_alerts = db.query(Alert).filter(Alert.is_resolved == False).count()
-    critical_alerts = db.query(Alert).filter(
-        Alert.is_resolved == False,
-        Alert.severity == AlertSeverity.CRITICAL
-    ).count()
-    
-    latest_plan = db.query(NightPlan).order_by(NightPlan.created_at.desc()).first()
+def _build_dashboard_counts():
+    """
+    Every dashboard count in one round-trip: one aggregate subquery per
+    table, cross-joined into a single row. The current time is a bind
+    parameter so the statement is built and compiled only once.
+    """
+    now = bindparam("now")
+    aggregates = [
+        select(
+            func.count().label("total_trains"),
+            func.count(case((Train.status == TrainStatus.ACTIVE, 1))).label("active_trains")
+        ).subquery(),
+        select(
+            func.count(case((FitnessCertificate.status == CertificateStatus.EXPIRED, 1))).label("expired_certs"),
+            func.count(case((FitnessCertificate.status == CertificateStatus.EXPIRING_SOON, 1))).label("expiring_certs")
+        ).where(FitnessCertificate.status.in_([CertificateStatus.EXPIRED, CertificateStatus.EXPIRING_SOON])).subquery(),
+        select(
+            func.count(case((JobCard.status.in_([JobStatus.OPEN, JobStatus.IN_PROGRESS]), 1))).label("open_jobs"),
+            func.count(case((JobCard.safety_critical == True, 1))).label("safety_critical_jobs")
+        ).where(JobCard.status != JobStatus.CLOSED).subquery(),
+        select(
+            func.count().label("active_contracts"),
+            func.count(case((BrandingContract.is_compliant == False, 1))).label("at_risk_branding")
+        ).where(BrandingContract.campaign_end > now).subquery(),
+        select(
+            func.count().label("cleaning_overdue")
+        ).where(CleaningRecord.status == CleaningStatus.OVERDUE).subquery(),
+        select(
+            func.count().label("unresolved_alerts"),
+            func.count(case((Alert.severity == AlertSeverity.CRITICAL, 1))).label("critical_alerts")
+        ).where(Alert.is_resolved == False).subquery()
+    ]
+    
+    query = select(*(column for aggregate in aggregates for column in aggregate.c)).select_from(aggregates[0])
+    for aggregate in aggregates[1:]:
+        query = query.join(aggregate, true())
+    return query
+
+_DASHBOARD_COUNTS = _build_dashboard_counts()
+
+def _dashboard_counts(db: Session):
+    return db.execute(_DASHBOARD_COUNTS, {"now": datetime.utcnow()}).one()
+
+@shared_ttl_cache("dashboard:summary:v1", 15)
+def _dashboard_summary() -> Dict[str, Any]:
+    """Dashboard figures (cached for 15s, cleared when plans or alerts change)"""
+    db = SessionLocal()
+    try:
+        counts = _dashboard_counts(db)
+        latest_plan = db.query(NightPlan).order_by(NightPlan.created_at.desc()).first()
+    finally:
+        db.close()
     
     return {
         "fleet": {
-            "total": total_trains,
-            "active": active_trains,
-            "under_maintenance": total_trains - active_trains
+            "total": counts.total_trains,
+            "active": counts.active_trains,
+            "under_maintenance": counts.total_trains - counts.active_trains
         },
         "certificates": {
-            "expired": expired_certs,
-            "expiring_soon": expiring_certs
+            "expired": counts.expired_certs,
+            "expiring_soon": counts.expiring_certs
         },
         "maintenance": {
-            "open_jobs": open_jobs,
-            "safety_critical": safety_critical_jobs
+            "open_jobs": counts.open_jobs,
+            "safety_critical": counts.safety_critical_jobs
         },
         "branding": {
-            "active_contracts": active_contracts,
-            "at_risk": at_risk_branding
+            "active_contracts": counts.active_contracts,
+            "at_risk": counts.at_risk_branding
         },
         "cleaning": {
-            "overdue": cleaning_overdue
+            "overdue": counts.cleaning_overdue
         },
         "alerts": {
-            "unresolved": unresolved_alerts,
-            "critical": critical_alerts
+            "unresolved": counts.unresolved_alerts,
+            "critical": counts.critical_alerts
         },
-        "latest_plan": latest_plan.to_dict() if latest_plan else None,
-        "ai_enabled": is_ai_enabled(),
-        "timestamp": datetime.utcnow().isoformat()
+        "latest_plan": latest_plan.to_dict() if latest_plan else None
     }
 
+@app.get("/api/dashboard/summary")
+def get_dashboard_summary():
+    # The cached figures are already plain JSON types; returning the response
+    # directly skips FastAPI's jsonable_encoder walk over the nested dicts
+    return ORJSONResponse({
+        **_dashboard_summary(),
+        "ai_enabled": app.state.flags["ai"],
+        "timestamp": datetime.utcnow()
+    })
+
 # ==================== Override Logs ====================
 
+# The fields of OverrideLog.to_dict(), selected as plain rows rather than ORM entities
+OVERRIDE_LOG_COLUMNS = tuple(OverrideLog.__table__.c)
+
 @app.get("/api/override-logs")
-async def get_override_logs(
+def get_override_logs(
     plan_id: Optional[int] = None,
-    limit: int = 50,
+    limit: int = Query(50, ge=1),
     db: Session = Depends(get_db)
 ):
-    query = db.query(OverrideLog)
+    stmt = lambda_stmt(lambda: select(*OVERRIDE_LOG_COLUMNS))
     
     if plan_id:
-        query = query.filter(OverrideLog.plan_id == plan_id)
+        stmt += lambda s: s.where(OverrideLog.plan_id == plan_id)
     
-    logs = query.order_by(OverrideLog.created_at.desc()).limit(limit).all()
-    return {"logs": [l.to_dict() for l in logs]}
+    stmt += lambda s: s.order_by(OverrideLog.created_at.desc()).limit(limit)
+    logs = db.execute(stmt).all()
+    return {"logs": [l._asdict() for l in logs]}
 
 
 if __name__ == "__main__":
+    # python -m app.main - multi-worker server; "auto" picks uvloop/httptools when installed
     import uvicorn
-    uvicorn.run(app, host=settings.host, port=settings.port)
+    uvicorn.run(
+        "app.main:app",
+        host=settings.host,
+        port=settings.port,
+        loop="auto",
+        http="auto",
+        workers=settings.workers,
+        limit_concurrency=1000,
+        timeout_keep_alive=30
+    )
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum, ForeignKey, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum, ForeignKey, Text, Float, Index, case
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -25,9 +26,13 @@ class BrandingContract(Base):
     Tracks exposure requirements and compliance.
     """
     __tablename__ = "branding_contracts"
+    __table_args__ = (
+        # Covers the active/at-risk contract counts without touching the table
+        Index("ix_bc_active_compliance", "campaign_end", "is_compliant"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    train_id = Column(Integer, ForeignKey("trains.id"), nullable=False)
+    train_id = Column(Integer, ForeignKey("trains.id"), nullable=False, index=True)
     
     # Contract identification
     brand_id = Column(String(50), index=True)
@@ -86,15 +91,35 @@ class BrandingContract(Base):
     def __repr__(self):
         return f"<BrandingContract {self.brand_name} on Train {self.train_id}>"
     
-    def get_weekly_deficit(self) -> float:
-        """Get exposure deficit for current week"""
+    @hybrid_property
+    def weekly_deficit(self) -> float:
+        """Exposure deficit for current week (also usable in SQL filters/ordering)"""
         return max(0, self.target_exposure_hours_weekly - self.current_exposure_hours_week)
     
-    def get_monthly_deficit(self) -> float:
-        """Get exposure deficit for current month"""
+    @weekly_deficit.inplace.expression
+    @classmethod
+    def _weekly_deficit_expression(cls):
+        return case(
+            (cls.target_exposure_hours_weekly > cls.current_exposure_hours_week,
+             cls.target_exposure_hours_weekly - cls.current_exposure_hours_week),
+            else_=0
+        )
+    
+    @hybrid_property
+    def monthly_deficit(self) -> float:
+        """Exposure deficit for current month (also usable in SQL filters/ordering)"""
         return max(0, self.target_exposure_hours_monthly - self.current_exposure_hours_month)
     
-    def get_urgency_score(self) -> float:
+    @monthly_deficit.inplace.expression
+    @classmethod
+    def _monthly_deficit_expression(cls):
+        return case(
+            (cls.target_exposure_hours_monthly > cls.current_exposure_hours_month,
+             cls.target_exposure_hours_monthly - cls.current_exposure_hours_month),
+            else_=0
+        )
+    
+    def get_urgency_score(self, monthly_deficit: float = None) -> float:
         """Calculate urgency score based on deficit and remaining time"""
         now = datetime.utcnow()
         if now > self.campaign_end:
@@ -104,7 +129,7 @@ class BrandingContract(Base):
         if remaining_days <= 0:
             return 100  # Max urgency
         
-        deficit = self.get_monthly_deficit()
+        deficit = self.monthly_deficit if monthly_deficit is None else monthly_deficit
         if self.target_exposure_hours_monthly > 0:
             deficit_ratio = deficit / self.target_exposure_hours_monthly
         else:
@@ -115,6 +140,7 @@ class BrandingContract(Base):
         return min(100, urgency)
     
     def to_dict(self):
+        monthly_deficit = self.monthly_deficit
         return {
             "id": self.id,
             "train_id": self.train_id,
@@ -133,9 +159,9 @@ class BrandingContract(Base):
             "penalty_per_hour_shortfall": self.penalty_per_hour_shortfall,
             "is_compliant": self.is_compliant,
             "compliance_percentage": self.compliance_percentage,
-            "weekly_deficit": self.get_weekly_deficit(),
-            "monthly_deficit": self.get_monthly_deficit(),
-            "urgency_score": self.get_urgency_score(),
+            "weekly_deficit": self.weekly_deficit,
+            "monthly_deficit": monthly_deficit,
+            "urgency_score": self.get_urgency_score(monthly_deficit),
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
@@ -148,7 +174,7 @@ class BrandingExposureLog(Base):
     __tablename__ = "branding_exposure_logs"
     
     id = Column(Integer, primary_key=True, index=True)
-    contract_id = Column(Integer, ForeignKey("branding_contracts.id"), nullable=False)
+    contract_id = Column(Integer, ForeignKey("branding_contracts.id"), nullable=False, index=True)
     
     # Date
     log_date = Column(DateTime, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Boolean, Enum as SQLEnum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
 import enum
@@ -28,6 +28,10 @@ class CleaningRecord(Base):
     Tracks cleaning status, schedules, and requirements.
     """
     __tablename__ = "cleaning_records"
+    __table_args__ = (
+        Index("ix_cr_train_status", "train_id", "status"),
+        Index("ix_cr_status", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     train_id = Column(Integer, ForeignKey("trains.id"), nullable=False)
@@ -83,9 +87,10 @@ class CleaningRecord(Base):
         delta = datetime.utcnow() - self.last_cleaned_at
         return delta.total_seconds() / 86400
     
-    def is_cleaning_required(self) -> bool:
+    def is_cleaning_required(self, days: float = None) -> bool:
         """Check if cleaning is required based on policy"""
-        days = self.days_since_last_cleaning()
+        if days is None:
+            days = self.days_since_last_cleaning()
         return (
             days >= self.max_days_without_cleaning or
             self.special_clean_required or
@@ -93,7 +98,7 @@ class CleaningRecord(Base):
             self.status in [CleaningStatus.OVERDUE, CleaningStatus.SPECIAL_REQUIRED]
         )
     
-    def get_cleaning_urgency(self) -> float:
+    def get_cleaning_urgency(self, days: float = None) -> float:
         """
         Get cleaning urgency score.
         0 = not urgent, 100 = critical
@@ -103,7 +108,8 @@ class CleaningRecord(Base):
         if self.vip_inspection_tomorrow:
             return 95
         
-        days = self.days_since_last_cleaning()
+        if days is None:
+            days = self.days_since_last_cleaning()
         if days >= self.max_days_without_cleaning:
             return 90
         if days >= self.deep_clean_interval_days:
@@ -114,16 +120,19 @@ class CleaningRecord(Base):
     
     def update_status(self):
         """Update status based on current state"""
+        days = self.days_since_last_cleaning()
         if self.special_clean_required:
             self.status = CleaningStatus.SPECIAL_REQUIRED
-        elif self.days_since_last_cleaning() >= self.max_days_without_cleaning:
+        elif days >= self.max_days_without_cleaning:
             self.status = CleaningStatus.OVERDUE
-        elif self.days_since_last_cleaning() >= self.deep_clean_interval_days:
+        elif days >= self.deep_clean_interval_days:
             self.status = CleaningStatus.DUE
         else:
             self.status = CleaningStatus.OK
     
     def to_dict(self):
+        # One clock read per record; the derived fields all use it
+        days = self.days_since_last_cleaning()
         return {
             "id": self.id,
             "train_id": self.train_id,
@@ -131,15 +140,15 @@ class CleaningRecord(Base):
             "last_cleaning_type": self.last_cleaning_type.value if self.last_cleaning_type else None,
             "last_cleaned_at": self.last_cleaned_at.isoformat() if self.last_cleaned_at else None,
             "last_cleaned_by": self.last_cleaned_by,
-            "days_since_last_cleaning": self.days_since_last_cleaning(),
+            "days_since_last_cleaning": days,
             "next_light_clean_due": self.next_light_clean_due.isoformat() if self.next_light_clean_due else None,
             "next_deep_clean_due": self.next_deep_clean_due.isoformat() if self.next_deep_clean_due else None,
             "special_clean_required": self.special_clean_required,
             "special_clean_reason": self.special_clean_reason,
             "vip_inspection_tomorrow": self.vip_inspection_tomorrow,
             "max_days_without_cleaning": self.max_days_without_cleaning,
-            "is_cleaning_required": self.is_cleaning_required(),
-            "cleaning_urgency": self.get_cleaning_urgency(),
+            "is_cleaning_required": self.is_cleaning_required(days),
+            "cleaning_urgency": self.get_cleaning_urgency(days),
             "last_inspection_score": self.last_inspection_score,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
@@ -3,31 +3,54 @@ Database Configuration - PostgreSQL (Neon) / SQLite
 Production-ready with connection pooling and SSL support.
 """
 
-from sqlalchemy import create_engine, event, text
+from sqlalchemy import create_engine, event, text, select, func
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool, NullPool
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import DateTime
+from functools import lru_cache
 import os
 
-from ..config import get_database_url, is_postgresql
+from ..config import settings, get_database_url, is_postgresql
+from ..cache import ttl_cache
 
 # Get database URL
 DATABASE_URL = get_database_url()
 
 # Engine configuration based on database type
 if is_postgresql():
+    pg_options = {}
+    if make_url(DATABASE_URL).get_dialect().driver == "psycopg2":
+        # Also batch executemany UPDATE/DELETE (e.g. ORM flushes of many dirty rows)
+        pg_options["executemany_mode"] = "values_plus_batch"
+    
+    if settings.db_external_pooler:
+        # PgBouncer (e.g. Neon's -pooler endpoint) already pools; don't pool twice.
+        # Every checkout is a fresh connection, so a pre-ping would only add a round-trip
+        pg_options["poolclass"] = NullPool
+    else:
+        pg_options.update(
+            poolclass=QueuePool,
+            pool_pre_ping=True,  # Verify connections before use
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_pool_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_use_lifo=True,  # Reuse the warmest connection; idle extras age out
+        )
+    
     # PostgreSQL (Neon) configuration with connection pooling
     engine = create_engine(
         DATABASE_URL,
-        poolclass=QueuePool,
-        pool_size=5,
-        max_overflow=10,
-        pool_pre_ping=True,  # Verify connections before use
-        pool_recycle=300,  # Recycle connections every 5 minutes
+        query_cache_size=1200,  # Room for every distinct statement the app issues
         connect_args={
             "sslmode": "require",  # Required for Neon
             "connect_timeout": 10
-        }
+        },
+        **pg_options
     )
     print(f"✓ PostgreSQL (Neon) database configured")
 else:
@@ -35,7 +58,8 @@ else:
     engine = create_engine(
         DATABASE_URL,
         connect_args={"check_same_thread": False},
-        poolclass=NullPool
+        poolclass=NullPool,
+        query_cache_size=1200
     )
     print(f"✓ SQLite database configured (local development)")
 
@@ -46,6 +70,31 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+class utcnow(FunctionElement):
+    """
+    Current UTC time rendered inline by the database, so timestamp defaults
+    need no bind parameter. Naive UTC to match datetime.utcnow() elsewhere.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow, "postgresql")
+def _pg_utcnow(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+@compiles(utcnow, "sqlite")
+def _sqlite_utcnow(element, compiler, **kw):
+    # UTC like CURRENT_TIMESTAMP, but keeps sub-second precision (%f is SS.SSS)
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+@compiles(utcnow)
+def _default_utcnow(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
 def get_db():
     """
     Dependency for FastAPI to get database session.
@@ -63,23 +112,16 @@ def init_db():
     Initialize database tables.
     Creates all tables defined in models if they don't exist.
     """
+    # Models are registered on Base when the models package is imported
+    if not settings.auto_create_tables:
+        print("! AUTO_CREATE_TABLES is off - skipping table creation")
+        return True
+    
     try:
-        # Import all models to ensure they're registered
-        from . import (
-            Train, FitnessCertificate, JobCard,
-            BrandingContract, MileageMeter, CleaningRecord,
-            DepotTrack, TrainPosition, NightPlan, PlanAssignment,
-            Alert, OverrideLog, CleaningBay, User
-        )
-        
-        # Create tables
+        # Create tables; this also proves the connection works, as it
+        # inspects the existing schema first
         Base.metadata.create_all(bind=engine)
         
-        # Test connection
-        with engine.connect() as conn:
-            result = conn.execute(text("SELECT 1"))
-            result.fetchone()
-        
         print(f"✓ Database tables initialized successfully")
         return True
     except Exception as e:
@@ -87,27 +129,29 @@ def init_db():
         return False
 
 
+@lru_cache(maxsize=1)
+def _server_version() -> str:
+    """Database server version, queried once per process"""
+    with engine.connect() as conn:
+        if is_postgresql():
+            version = conn.execute(text("SELECT version()")).scalar()
+            return version.split(",")[0] if version else "Unknown"
+        return conn.execute(text("SELECT sqlite_version()")).scalar()
+
+
+@ttl_cache(5)
 def test_connection() -> dict:
-    """Test database connection and return status"""
+    """Test database connection and return status (cached for 5s)"""
     try:
-        with engine.connect() as conn:
-            # Test query
-            if is_postgresql():
-                result = conn.execute(text("SELECT version()"))
-                version = result.fetchone()[0]
-                return {
-                    "connected": True,
-                    "type": "PostgreSQL",
-                    "version": version.split(",")[0] if version else "Unknown"
-                }
-            else:
-                result = conn.execute(text("SELECT sqlite_version()"))
-                version = result.fetchone()[0]
-                return {
-                    "connected": True,
-                    "type": "SQLite",
-                    "version": version
-                }
+        # Checking out a connection is the liveness test (the pooled
+        # PostgreSQL engine pre-pings it); the version never changes
+        with engine.connect():
+            pass
+        return {
+            "connected": True,
+            "type": "PostgreSQL" if is_postgresql() else "SQLite",
+            "version": _server_version()
+        }
     except Exception as e:
         return {
             "connected": False,
@@ -115,22 +159,35 @@ def test_connection() -> dict:
         }
 
 
+@ttl_cache(15)
+def _table_counts() -> dict:
+    """Record counts for all tables in one round-trip (cached for 15s; errors are not cached)"""
+    from . import Train, FitnessCertificate, JobCard, BrandingContract, MileageMeter, CleaningRecord, NightPlan
+    
+    tables = {
+        "trains": Train,
+        "certificates": FitnessCertificate,
+        "job_cards": JobCard,
+        "branding_contracts": BrandingContract,
+        "mileage_records": MileageMeter,
+        "cleaning_records": CleaningRecord,
+        "plans": NightPlan
+    }
+    # One SELECT of scalar subqueries: a single round-trip, one snapshot
+    query = select(*(
+        select(func.count()).select_from(model).scalar_subquery().label(name)
+        for name, model in tables.items()
+    ))
+    with engine.connect() as conn:
+        return dict(conn.execute(query).mappings().one())
+
+
 def get_table_counts() -> dict:
-    """Get record counts for all tables"""
+    """Get record counts for all tables (cleared when mock data is regenerated)"""
     try:
-        db = SessionLocal()
-        from . import Train, FitnessCertificate, JobCard, BrandingContract, MileageMeter, CleaningRecord, NightPlan
-        
-        counts = {
-            "trains": db.query(Train).count(),
-            "certificates": db.query(FitnessCertificate).count(),
-            "job_cards": db.query(JobCard).count(),
-            "branding_contracts": db.query(BrandingContract).count(),
-            "mileage_records": db.query(MileageMeter).count(),
-            "cleaning_records": db.query(CleaningRecord).count(),
-            "plans": db.query(NightPlan).count()
-        }
-        db.close()
-        return counts
+        return _table_counts()
     except Exception as e:
         return {"error": str(e)}
+
+
+get_table_counts.cache_clear = _table_counts.cache_clear
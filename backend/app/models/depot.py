@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
-from .database import Base
+from .database import Base, utcnow
 
 
 class DepotTrack(Base):
@@ -10,6 +10,8 @@ class DepotTrack(Base):
     Used to model the physical layout of the depot for shunting optimization.
     """
     __tablename__ = "depot_tracks"
+    # updated_at is stamped by the database; fetch it with RETURNING on UPDATE
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -49,8 +51,8 @@ class DepotTrack(Base):
     notes = Column(Text)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow())
+    updated_at = Column(DateTime, default=utcnow(), onupdate=utcnow())
     
     # Relationships
     train_positions = relationship("TrainPosition", back_populates="track", cascade="all, delete-orphan")
@@ -91,11 +93,16 @@ class TrainPosition(Base):
     Used for shunting optimization.
     """
     __tablename__ = "train_positions"
+    __table_args__ = (
+        # Positions are read per track in exit order
+        Index("ix_tp_track_pos", "track_id", "position_in_track"),
+    )
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     
     # Train and track
-    train_id = Column(Integer, ForeignKey("trains.id"))
+    train_id = Column(Integer, ForeignKey("trains.id"), index=True)
     track_id = Column(Integer, ForeignKey("depot_tracks.id"), nullable=False)
     
     # Position in track (0 = closest to exit)
@@ -117,11 +124,12 @@ class TrainPosition(Base):
     notes = Column(Text)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow())
+    updated_at = Column(DateTime, default=utcnow(), onupdate=utcnow())
     
     # Relationships
     track = relationship("DepotTrack", back_populates="train_positions")
+    train = relationship("Train", back_populates="positions")
     
     def __repr__(self):
         return f"<TrainPosition Train {self.train_id} at {self.track_id}>"
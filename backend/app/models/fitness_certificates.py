@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum, ForeignKey, Text, Index, and_, or_
+from sqlalchemy.ext.hybrid import hybrid_method
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
-from .database import Base
+from .database import Base, utcnow
 
 
 class Department(str, enum.Enum):
@@ -31,6 +32,12 @@ class FitnessCertificate(Base):
     A train needs valid certificates from all three departments for revenue service.
     """
     __tablename__ = "fitness_certificates"
+    __table_args__ = (
+        Index("ix_fc_train_status", "train_id", "status"),
+        Index("ix_fc_status", "status"),
+    )
+    # Read back the database-stamped updated_at in the UPDATE itself
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     train_id = Column(Integer, ForeignKey("trains.id"), nullable=False)
@@ -66,8 +73,8 @@ class FitnessCertificate(Base):
     pending_issues = Column(Text)  # JSON list of issues
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow())
+    updated_at = Column(DateTime, default=utcnow(), onupdate=utcnow())
     
     # Relationship
     train = relationship("Train", back_populates="fitness_certificates")
@@ -75,8 +82,9 @@ class FitnessCertificate(Base):
     def __repr__(self):
         return f"<FitnessCertificate {self.certificate_number} - {self.department.value}>"
     
+    @hybrid_method
     def is_valid_at(self, check_time: datetime = None) -> bool:
-        """Check if certificate is valid at given time"""
+        """Check if certificate is valid at given time (also usable in SQL filters)"""
         if check_time is None:
             check_time = datetime.utcnow()
         
@@ -92,14 +100,29 @@ class FitnessCertificate(Base):
         
         return self.valid_from <= check_time <= self.valid_to
     
-    def hours_until_expiry(self) -> float:
+    @is_valid_at.inplace.expression
+    @classmethod
+    def _is_valid_at_expression(cls, check_time: datetime):
+        return and_(
+            cls.status.not_in([CertificateStatus.EXPIRED, CertificateStatus.SUSPENDED]),
+            or_(
+                and_(cls.emergency_override.is_(True), cls.override_expires_at >= check_time),
+                and_(cls.valid_from <= check_time, cls.valid_to >= check_time)
+            )
+        )
+    
+    def hours_until_expiry(self, now: datetime = None) -> float:
         """Get hours until certificate expires"""
-        now = datetime.utcnow()
+        if now is None:
+            now = datetime.utcnow()
         if self.valid_to < now:
             return 0
         return (self.valid_to - now).total_seconds() / 3600
     
-    def to_dict(self):
+    def to_dict(self, now: datetime = None):
+        # List endpoints pass one shared `now` for every row
+        if now is None:
+            now = datetime.utcnow()
         return {
             "id": self.id,
             "train_id": self.train_id,
@@ -117,8 +140,8 @@ class FitnessCertificate(Base):
             "override_reason": self.override_reason,
             "override_expires_at": self.override_expires_at.isoformat() if self.override_expires_at else None,
             "remarks": self.remarks,
-            "hours_until_expiry": self.hours_until_expiry(),
-            "is_currently_valid": self.is_valid_at(),
+            "hours_until_expiry": self.hours_until_expiry(now),
+            "is_currently_valid": self.is_valid_at(now),
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum, ForeignKey, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SQLEnum, ForeignKey, Text, Float, Index, and_, or_
+from sqlalchemy.ext.hybrid import hybrid_method
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
-from .database import Base
+from .database import Base, utcnow
 
 
 class JobType(str, enum.Enum):
@@ -37,6 +38,12 @@ class JobCard(Base):
     Represents maintenance tasks for trainsets.
     """
     __tablename__ = "job_cards"
+    __table_args__ = (
+        Index("ix_jc_train_status", "train_id", "status"),
+        Index("ix_jc_status_safety", "status", "safety_critical"),
+    )
+    # Read back the database-stamped updated_at in the UPDATE itself
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     train_id = Column(Integer, ForeignKey("trains.id"), nullable=False)
@@ -98,8 +105,8 @@ class JobCard(Base):
     assigned_team = Column(String(50))
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow())
+    updated_at = Column(DateTime, default=utcnow(), onupdate=utcnow())
     
     # Relationship
     train = relationship("Train", back_populates="job_cards")
@@ -107,8 +114,9 @@ class JobCard(Base):
     def __repr__(self):
         return f"<JobCard {self.job_id} - {self.title}>"
     
+    @hybrid_method
     def is_blocking(self) -> bool:
-        """Check if this job blocks the train from service"""
+        """Check if this job blocks the train from service (also usable in SQL filters)"""
         if self.status == JobStatus.CLOSED:
             return False
         if self.safety_critical and self.status in [JobStatus.OPEN, JobStatus.IN_PROGRESS]:
@@ -117,22 +125,46 @@ class JobCard(Base):
             return True
         return False
     
-    def is_overdue(self) -> bool:
-        """Check if job is overdue"""
+    @is_blocking.inplace.expression
+    @classmethod
+    def _is_blocking_expression(cls):
+        return and_(
+            cls.status != JobStatus.CLOSED,
+            or_(
+                and_(cls.safety_critical.is_(True), cls.status.in_([JobStatus.OPEN, JobStatus.IN_PROGRESS])),
+                cls.blocks_service.is_(True)
+            )
+        )
+    
+    @hybrid_method
+    def is_overdue(self, now: datetime = None) -> bool:
+        """Check if job is overdue (also usable in SQL filters)"""
         if self.status == JobStatus.CLOSED:
             return False
-        if self.due_date and datetime.utcnow() > self.due_date:
+        if now is None:
+            now = datetime.utcnow()
+        if self.due_date and now > self.due_date:
             return True
         return False
     
-    def days_until_due(self) -> float:
+    @is_overdue.inplace.expression
+    @classmethod
+    def _is_overdue_expression(cls, now: datetime):
+        return and_(cls.status != JobStatus.CLOSED, cls.due_date < now)
+    
+    def days_until_due(self, now: datetime = None) -> float:
         """Get days until job is due"""
         if not self.due_date:
             return float('inf')
-        delta = self.due_date - datetime.utcnow()
+        if now is None:
+            now = datetime.utcnow()
+        delta = self.due_date - now
         return delta.total_seconds() / 86400
     
-    def to_dict(self):
+    def to_dict(self, now: datetime = None):
+        # List endpoints pass one shared `now` for every row
+        if now is None:
+            now = datetime.utcnow()
         return {
             "id": self.id,
             "train_id": self.train_id,
@@ -157,8 +189,8 @@ class JobCard(Base):
             "max_deferral_days": self.max_deferral_days,
             "fault_code": self.fault_code,
             "is_blocking": self.is_blocking(),
-            "is_overdue": self.is_overdue(),
-            "days_until_due": self.days_until_due(),
+            "is_overdue": self.is_overdue(now),
+            "days_until_due": self.days_until_due(now),
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -10,6 +10,15 @@ class MileageMeter(Base):
     Tracks total km, km since last overhaul, and maintenance thresholds.
     """
     __tablename__ = "mileage_meters"
+    __table_args__ = (
+        Index("ix_mm_train_id", "train_id"),
+        # Partial: only the few meters near their threshold are ever filtered for
+        Index(
+            "ix_mm_near_threshold", "is_near_threshold",
+            postgresql_where=text("is_near_threshold"),
+            sqlite_where=text("is_near_threshold = 1")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     train_id = Column(Integer, ForeignKey("trains.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Boolean, Enum as SQLEnum, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -88,7 +88,7 @@ class NightPlan(Base):
     ai_explanation = Column(Text)  # GenAI-generated explanation
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)  # Keyset pagination in /api/plans
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -135,6 +135,9 @@ class PlanAssignment(Base):
     Individual train assignment within a night plan.
     """
     __tablename__ = "plan_assignments"
+    __table_args__ = (
+        Index("ix_pa_plan_train", "plan_id", "train_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -236,7 +239,7 @@ class OverrideLog(Base):
     id = Column(Integer, primary_key=True, index=True)
     
     # References
-    plan_id = Column(Integer, ForeignKey("night_plans.id"))
+    plan_id = Column(Integer, ForeignKey("night_plans.id"), index=True)
     assignment_id = Column(Integer, ForeignKey("plan_assignments.id"))
     train_id = Column(Integer, ForeignKey("trains.id"))
     
@@ -285,12 +288,20 @@ class Alert(Base):
     Alerts and warnings generated by the system.
     """
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Partial: resolved alerts pile up but only open ones are counted
+        Index(
+            "ix_alert_open_severity", "severity",
+            postgresql_where=text("NOT is_resolved"),
+            sqlite_where=text("is_resolved = 0")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
     # References
     plan_id = Column(Integer, ForeignKey("night_plans.id"))
-    train_id = Column(Integer, ForeignKey("trains.id"))
+    train_id = Column(Integer, ForeignKey("trains.id"), index=True)
     
     # Alert details
     alert_type = Column(String(50), nullable=False)
@@ -314,7 +325,7 @@ class Alert(Base):
     resolution_notes = Column(Text)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     expires_at = Column(DateTime)
     
     # Relationships
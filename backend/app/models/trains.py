@@ -52,6 +52,7 @@ class Train(Base):
     mileage_meters = relationship("MileageMeter", back_populates="train", cascade="all, delete-orphan")
     cleaning_records = relationship("CleaningRecord", back_populates="train", cascade="all, delete-orphan")
     plan_assignments = relationship("PlanAssignment", back_populates="train", cascade="all, delete-orphan")
+    positions = relationship("TrainPosition", back_populates="train", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Train {self.train_id}>"
@@ -0,0 +1,140 @@
+"""
+KMRL Train Induction Planning System - API response schemas
+Pydantic models for hot read endpoints, serialized by pydantic-core
+straight from ORM objects instead of going through to_dict().
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
+
+from .models import (
+    TrainStatus, Department, CertificateStatus, Criticality,
+    JobType, JobStatus, JobPriority
+)
+
+
+def _context_now(info: ValidationInfo) -> Optional[datetime]:
+    """Shared timestamp passed as validation context={"now": ...}"""
+    return info.context.get("now") if info.context else None
+
+
+class TrainOut(BaseModel):
+    """Same fields as Train.to_dict()"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    train_id: str
+    train_number: int
+    name: Optional[str] = None
+    configuration: Optional[str] = None
+    manufacturer: Optional[str] = None
+    commissioning_date: Optional[datetime] = None
+    status: Optional[TrainStatus] = None
+    depot_id: Optional[str] = None
+    current_track: Optional[str] = None
+    current_position: Optional[int] = None
+    overall_health_score: Optional[float] = None
+    is_service_ready: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class TrainListOut(BaseModel):
+    trains: List[TrainOut]
+
+
+class FitnessCertificateOut(BaseModel):
+    """Same fields as FitnessCertificate.to_dict()"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    train_id: int
+    certificate_number: Optional[str] = None
+    department: Optional[Department] = None
+    status: Optional[CertificateStatus] = None
+    criticality: Optional[Criticality] = None
+    valid_from: Optional[datetime] = None
+    valid_to: Optional[datetime] = None
+    is_conditional: Optional[bool] = None
+    condition_notes: Optional[str] = None
+    max_speed_restriction: Optional[int] = None
+    emergency_override: Optional[bool] = None
+    override_approved_by: Optional[str] = None
+    override_reason: Optional[str] = None
+    override_expires_at: Optional[datetime] = None
+    remarks: Optional[str] = None
+    hours_until_expiry: float
+    is_currently_valid: bool = Field(validation_alias="is_valid_at")
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @field_validator("hours_until_expiry", "is_currently_valid", mode="before")
+    @classmethod
+    def _evaluate_at_now(cls, value: Any, info: ValidationInfo) -> Any:
+        # from_attributes hands over the bound model methods
+        return value(_context_now(info)) if callable(value) else value
+
+
+class JobCardOut(BaseModel):
+    """Same fields as JobCard.to_dict()"""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    train_id: int
+    job_id: Optional[str] = None
+    parent_job_id: Optional[str] = None
+    job_type: Optional[JobType] = None
+    priority: Optional[JobPriority] = None
+    status: Optional[JobStatus] = None
+    title: str
+    description: Optional[str] = None
+    related_component: Optional[str] = None
+    system_code: Optional[str] = None
+    location_on_train: Optional[str] = None
+    reported_date: Optional[datetime] = None
+    due_date: Optional[datetime] = None
+    estimated_downtime_hours: Optional[float] = None
+    safety_critical: Optional[bool] = None
+    requires_ibl: Optional[bool] = None
+    blocks_service: Optional[bool] = None
+    parts_available: Optional[bool] = None
+    can_be_deferred: Optional[bool] = None
+    max_deferral_days: Optional[int] = None
+    fault_code: Optional[str] = None
+    is_blocking: bool
+    is_overdue: bool
+    days_until_due: float
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @field_validator("is_blocking", mode="before")
+    @classmethod
+    def _evaluate(cls, value: Any) -> Any:
+        return value() if callable(value) else value
+
+    @field_validator("is_overdue", "days_until_due", mode="before")
+    @classmethod
+    def _evaluate_at_now(cls, value: Any, info: ValidationInfo) -> Any:
+        return value(_context_now(info)) if callable(value) else value
+
+
+class CertificateListOut(BaseModel):
+    certificates: List[FitnessCertificateOut]
+    total: int
+
+
+class JobCardListOut(BaseModel):
+    job_cards: List[JobCardOut]
+    total: int
+
+
+class TrainDetailOut(BaseModel):
+    train: TrainOut
+    fitness_certificates: List[FitnessCertificateOut]
+    job_cards: List[JobCardOut]
+    branding_contracts: List[Dict[str, Any]]
+    mileage: Optional[Dict[str, Any]] = None
+    cleaning: Optional[Dict[str, Any]] = None
+    position: Optional[Dict[str, Any]] = None
@@ -5,6 +5,10 @@ Provides AI-powered explanations, recommendations, and natural language understa
 
 import os
 import json
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
@@ -23,6 +27,32 @@ from ..models import (
 )
 from ..config import get_gemini_api_key, is_ai_enabled
 
+# Gemini answers keyed by a hash of the full prompt. Prompts embed the plan and
+# train data they are about, so changed data naturally misses the cache.
+RESPONSE_CACHE_SIZE = 512
+_response_cache: "OrderedDict[str, str]" = OrderedDict()
+# Threadpool handlers and the event loop both touch the cache
+_response_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _gemini_model():
+    """Gemini model handle, configured once per process"""
+    api_key = get_gemini_api_key()
+    if not (GEMINI_AVAILABLE and api_key and is_ai_enabled()):
+        print("! AI features disabled - Set GEMINI_API_KEY environment variable")
+        return None
+    try:
+        genai.configure(api_key=api_key)
+        # Use gemini-2.0-flash-exp for fast responses (gemini-pro deprecated)
+        # Also supports: gemini-1.5-pro, gemini-1.5-flash
+        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        print("✓ Gemini AI initialized successfully (gemini-2.0-flash-exp)")
+        return model
+    except Exception as e:
+        print(f"✗ Failed to initialize Gemini: {e}")
+        return None
+
 
 class AICopilot:
     """
@@ -30,27 +60,8 @@ class AICopilot:
     Uses Google Gemini for intelligent decision support.
     """
     
-    def __init__(self, db: Session):
-        self.db = db
-        self.model = None
-        self.ai_enabled = False
-        
-        api_key = get_gemini_api_key()
-        if GEMINI_AVAILABLE and api_key and is_ai_enabled():
-            try:
-                genai.configure(api_key=api_key)
-                # Use gemini-2.0-flash-exp for fast responses (gemini-pro deprecated)
-                # Also supports: gemini-1.5-pro, gemini-1.5-flash
-                self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-                self.ai_enabled = True
-                print("✓ Gemini AI initialized successfully (gemini-2.0-flash-exp)")
-            except Exception as e:
-                print(f"✗ Failed to initialize Gemini: {e}")
-        else:
-            print("! AI features disabled - Set GEMINI_API_KEY environment variable")
-        
-        # System context for KMRL domain
-        self.system_context = """You are KMRL Copilot, an expert AI assistant for Kochi Metro Rail Limited train operations.
+    # System context for KMRL domain
+    system_context = """You are KMRL Copilot, an expert AI assistant for Kochi Metro Rail Limited train operations.
 
 CONTEXT:
 - You help supervisors make nightly train induction decisions (21:00-23:00)
@@ -78,6 +89,12 @@ RULES:
 - Support Hindi, Malayalam, and English
 
 Always provide actionable, specific recommendations backed by data."""
+    
+    def __init__(self, db: Session, use_cache: bool = True):
+        self.db = db
+        self.use_cache = use_cache  # False forces a fresh Gemini call (e.g. regenerate)
+        self.model = _gemini_model()
+        self.ai_enabled = self.model is not None
 
     async def generate_plan_explanation(self, plan: NightPlan, assignments: List[Dict]) -> str:
         """Generate comprehensive AI explanation for an entire induction plan"""
@@ -95,7 +112,7 @@ ASSIGNMENT SUMMARY:
 - Out of Service: {plan.trains_out_of_service} trains
 
 OPTIMIZATION METRICS:
-- Overall Score: {plan.optimization_score:.1f if plan.optimization_score else 'N/A'}
+- Overall Score: {f'{plan.optimization_score:.1f}' if plan.optimization_score else 'N/A'}
 - Hard Constraints Violated: {plan.hard_constraints_violated or 0}
 """
         
@@ -383,12 +400,29 @@ For data queries, be specific with numbers and train IDs when possible."""
         if not self.ai_enabled or not self.model:
             return self._fallback_response(prompt)
         
+        key = hashlib.sha1(prompt.encode()).hexdigest()
+        if self.use_cache:
+            with _response_cache_lock:
+                cached = _response_cache.get(key)
+                if cached is not None:
+                    _response_cache.move_to_end(key)
+            if cached is not None:
+                return cached
+        
         try:
             response = self.model.generate_content(prompt)
-            return response.text
+            text = response.text
         except Exception as e:
             print(f"Gemini API error: {e}")
             return self._fallback_response(prompt)
+        
+        # Only real Gemini answers are cached; fallbacks are cheap to rebuild
+        with _response_cache_lock:
+            _response_cache[key] = text
+            _response_cache.move_to_end(key)
+            if len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+        return text
 
     def _fallback_response(self, prompt: str) -> str:
         """Generate basic response when AI is not available or rate limited"""
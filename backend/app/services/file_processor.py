@@ -5,6 +5,8 @@ Handles CSV and PDF uploads, stores in Cloudinary, extracts data using AI.
 
 import os
 import io
+import asyncio
+import importlib.util
 import json
 import csv
 import tempfile
@@ -20,12 +22,8 @@ try:
 except ImportError:
     CLOUDINARY_AVAILABLE = False
 
-# Groq
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
+# Groq (clients come from config.get_groq_client; only check the SDK is installed)
+GROQ_AVAILABLE = importlib.util.find_spec("groq") is not None
 
 # PDF parsing
 try:
@@ -34,9 +32,11 @@ try:
 except ImportError:
     PDF_AVAILABLE = False
 
+from sqlalchemy import select, bindparam, insert
 from sqlalchemy.orm import Session
 
-from ..config import settings, is_cloudinary_enabled, is_groq_enabled, get_groq_api_key
+from ..config import settings, is_cloudinary_enabled, is_groq_enabled, get_groq_client
+from ..cache import set_job_status
 from ..models import (
     Train, TrainStatus,
     FitnessCertificate, Department, CertificateStatus, Criticality,
@@ -46,6 +46,106 @@ from ..models import (
 )
 
 
+# Built once and re-executed with new bind values, so the compiled SQL is cached
+_TRAIN_PK_BY_CODE = select(Train.id).where(Train.train_id == bindparam("train_code"))
+
+
+class EnumLookup(dict):
+    """Value -> member map for an enum; unknown values fail exactly like Enum(value)"""
+    
+    def __init__(self, enum_cls):
+        super().__init__((member.value, member) for member in enum_cls)
+        self.enum_cls = enum_cls
+    
+    def __missing__(self, value):
+        return self.enum_cls(value)
+
+
+# Built once so the per-row upload paths do a dict lookup instead of Enum.__call__
+TRAIN_STATUSES = EnumLookup(TrainStatus)
+DEPARTMENTS = EnumLookup(Department)
+CERTIFICATE_STATUSES = EnumLookup(CertificateStatus)
+CRITICALITIES = EnumLookup(Criticality)
+JOB_TYPES = EnumLookup(JobType)
+JOB_STATUSES = EnumLookup(JobStatus)
+JOB_PRIORITIES = EnumLookup(JobPriority)
+CLEANING_STATUSES = EnumLookup(CleaningStatus)
+BRANDING_PRIORITIES = EnumLookup(BrandingPriority)
+TIME_BANDS = EnumLookup(TimeBand)
+
+# Expected fields per upload data type
+UPLOAD_SCHEMAS = {
+    "trains": {
+        "train_id": "string (e.g., TS-201)",
+        "train_number": "integer",
+        "name": "string",
+        "configuration": "string (3-car or 6-car)",
+        "status": "string (active, under_maintenance, out_of_service)",
+        "depot_id": "string (default: MUTTOM)",
+        "overall_health_score": "float (0-100)"
+    },
+    "certificates": {
+        "train_id": "string (e.g., TS-201)",
+        "department": "string (RollingStock, Signalling, Telecom)",
+        "status": "string (Valid, ExpiringSoon, Expired, Suspended)",
+        "valid_from": "date (ISO format)",
+        "valid_to": "date (ISO format)",
+        "criticality": "string (hard, soft, monitor)",
+        "remarks": "string",
+        "is_conditional": "boolean",
+        "condition_notes": "string",
+        "emergency_override": "boolean",
+        "override_approved_by": "string",
+        "override_reason": "string"
+    },
+    "job-cards": {
+        "train_id": "string (e.g., TS-201)",
+        "job_id": "string (work order number)",
+        "title": "string",
+        "description": "string",
+        "job_type": "string (preventive, corrective, inspection, overhaul, emergency)",
+        "priority": "integer (1-5, 1=critical)",
+        "status": "string (OPEN, IN_PROGRESS, PENDING_PARTS, DEFERRED, CLOSED)",
+        "related_component": "string (bogie, brake, door, HVAC, traction, etc.)",
+        "safety_critical": "boolean",
+        "requires_ibl": "boolean",
+        "due_date": "date (ISO format)",
+        "estimated_downtime_hours": "float",
+        "parts_available": "boolean"
+    },
+    "branding": {
+        "train_id": "string (e.g., TS-201)",
+        "brand_name": "string",
+        "campaign_name": "string",
+        "priority": "string (platinum, gold, silver, bronze)",
+        "campaign_start": "date (ISO format)",
+        "campaign_end": "date (ISO format)",
+        "target_exposure_hours_weekly": "float",
+        "target_exposure_hours_monthly": "float",
+        "penalty_per_hour_shortfall": "float",
+        "required_time_band": "string (all_day, peak_only, off_peak)"
+    },
+    "mileage": {
+        "train_id": "string (e.g., TS-201)",
+        "lifetime_km": "float",
+        "km_since_last_service": "float",
+        "km_since_last_overhaul": "float",
+        "service_threshold_km": "float (default: 20000)",
+        "overhaul_threshold_km": "float (default: 100000)",
+        "avg_daily_km": "float"
+    },
+    "cleaning": {
+        "train_id": "string (e.g., TS-201)",
+        "status": "string (ok, due, overdue, special_required)",
+        "last_cleaned_at": "datetime (ISO format)",
+        "special_clean_required": "boolean",
+        "special_clean_reason": "string",
+        "vip_inspection_tomorrow": "boolean",
+        "vip_inspection_notes": "string"
+    }
+}
+
+
 class FileProcessor:
     """
     Handles file uploads, storage, and intelligent data extraction.
@@ -78,17 +178,37 @@ class FileProcessor:
         # Initialize Groq
         if GROQ_AVAILABLE and is_groq_enabled():
             try:
-                self.groq_client = Groq(api_key=get_groq_api_key())
+                self.groq_client = get_groq_client()
                 print("✓ Groq LLM initialized")
             except Exception as e:
                 print(f"✗ Groq init failed: {e}")
     
+    @staticmethod
+    def cloudinary_public_id(filename: str) -> str:
+        """Public id a stored upload will get (known before the upload finishes)"""
+        return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
+    
     async def upload_to_cloudinary(self, file_content: bytes, filename: str, 
-                                    resource_type: str = "auto") -> Optional[Dict]:
-        """Upload file to Cloudinary and return URL"""
+                                    resource_type: str = "auto",
+                                    public_id: Optional[str] = None,
+                                    job_id: Optional[str] = None) -> Optional[Dict]:
+        """
+        Upload file to Cloudinary and return URL.
+        With a job_id the outcome is also recorded for /api/upload/status/{job_id}.
+        """
         if not self.cloudinary_enabled:
             return None
         
+        # The SDK call is blocking network I/O - keep it off the event loop
+        return await asyncio.to_thread(
+            self._upload_to_cloudinary, file_content, filename, resource_type,
+            public_id or self.cloudinary_public_id(filename), job_id
+        )
+    
+    def _upload_to_cloudinary(self, file_content: bytes, filename: str,
+                              resource_type: str, public_id: str,
+                              job_id: Optional[str] = None) -> Optional[Dict]:
+        tmp_path = None
         try:
             # Create temp file
             with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as tmp:
@@ -100,22 +220,29 @@ class FileProcessor:
                 tmp_path,
                 folder="kmrl_uploads",
                 resource_type=resource_type,
-                public_id=f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}",
+                public_id=public_id,
                 tags=["kmrl", "data_import"]
             )
             
-            # Cleanup temp file
-            os.unlink(tmp_path)
-            
-            return {
+            stored = {
                 "url": result.get("secure_url"),
                 "public_id": result.get("public_id"),
                 "format": result.get("format"),
                 "size": result.get("bytes")
             }
+            if job_id:
+                set_job_status(job_id, {"status": "stored", "cloudinary_url": stored["url"], "public_id": stored["public_id"]})
+            return stored
         except Exception as e:
-            print(f"Cloudinary upload error: {e}")
+            # Queued uploads have no caller to report to, so name the file that was lost
+            print(f"✗ Cloudinary upload failed for kmrl_uploads/{public_id}: {type(e).__name__}: {e}")
+            if job_id:
+                set_job_status(job_id, {"status": "failed", "public_id": public_id, "error": str(e)})
             return None
+        finally:
+            # Cleanup temp file
+            if tmp_path:
+                os.unlink(tmp_path)
     
     async def process_csv(self, content: bytes, data_type: str) -> Dict[str, Any]:
         """Process CSV file and extract structured data"""
@@ -301,77 +428,7 @@ Response format (JSON array only, no explanation):
     
     def _get_schema(self, data_type: str) -> Dict:
         """Get schema definition for each data type"""
-        schemas = {
-            "trains": {
-                "train_id": "string (e.g., TS-201)",
-                "train_number": "integer",
-                "name": "string",
-                "configuration": "string (3-car or 6-car)",
-                "status": "string (active, under_maintenance, out_of_service)",
-                "depot_id": "string (default: MUTTOM)",
-                "overall_health_score": "float (0-100)"
-            },
-            "certificates": {
-                "train_id": "string (e.g., TS-201)",
-                "department": "string (RollingStock, Signalling, Telecom)",
-                "status": "string (Valid, ExpiringSoon, Expired, Suspended)",
-                "valid_from": "date (ISO format)",
-                "valid_to": "date (ISO format)",
-                "criticality": "string (hard, soft, monitor)",
-                "remarks": "string",
-                "is_conditional": "boolean",
-                "condition_notes": "string",
-                "emergency_override": "boolean",
-                "override_approved_by": "string",
-                "override_reason": "string"
-            },
-            "job-cards": {
-                "train_id": "string (e.g., TS-201)",
-                "job_id": "string (work order number)",
-                "title": "string",
-                "description": "string",
-                "job_type": "string (preventive, corrective, inspection, overhaul, emergency)",
-                "priority": "integer (1-5, 1=critical)",
-                "status": "string (OPEN, IN_PROGRESS, PENDING_PARTS, DEFERRED, CLOSED)",
-                "related_component": "string (bogie, brake, door, HVAC, traction, etc.)",
-                "safety_critical": "boolean",
-                "requires_ibl": "boolean",
-                "due_date": "date (ISO format)",
-                "estimated_downtime_hours": "float",
-                "parts_available": "boolean"
-            },
-            "branding": {
-                "train_id": "string (e.g., TS-201)",
-                "brand_name": "string",
-                "campaign_name": "string",
-                "priority": "string (platinum, gold, silver, bronze)",
-                "campaign_start": "date (ISO format)",
-                "campaign_end": "date (ISO format)",
-                "target_exposure_hours_weekly": "float",
-                "target_exposure_hours_monthly": "float",
-                "penalty_per_hour_shortfall": "float",
-                "required_time_band": "string (all_day, peak_only, off_peak)"
-            },
-            "mileage": {
-                "train_id": "string (e.g., TS-201)",
-                "lifetime_km": "float",
-                "km_since_last_service": "float",
-                "km_since_last_overhaul": "float",
-                "service_threshold_km": "float (default: 20000)",
-                "overhaul_threshold_km": "float (default: 100000)",
-                "avg_daily_km": "float"
-            },
-            "cleaning": {
-                "train_id": "string (e.g., TS-201)",
-                "status": "string (ok, due, overdue, special_required)",
-                "last_cleaned_at": "datetime (ISO format)",
-                "special_clean_required": "boolean",
-                "special_clean_reason": "string",
-                "vip_inspection_tomorrow": "boolean",
-                "vip_inspection_notes": "string"
-            }
-        }
-        return schemas.get(data_type, {})
+        return UPLOAD_SCHEMAS.get(data_type, {})
     
     async def process_and_save(self, content: bytes, filename: str, 
                                 data_type: str, store_in_cloudinary: bool = True) -> Dict:
@@ -420,7 +477,8 @@ Response format (JSON array only, no explanation):
             
             # 3. Save to database
             if parsed and parsed.get("success") and parsed.get("records"):
-                saved = await self._save_to_database(parsed["records"], data_type)
+                # Blocking ORM work - run it in a worker thread, off the event loop
+                saved = await asyncio.to_thread(self._save_to_database, parsed["records"], data_type)
                 result["saved"] = saved
             else:
                 result["saved"] = {"saved_count": 0, "errors": [parsed.get("error", "No records to save")]}
@@ -431,29 +489,36 @@ Response format (JSON array only, no explanation):
         
         return result
     
-    async def _save_to_database(self, records: List[Dict], data_type: str) -> Dict:
+    def _save_to_database(self, records: List[Dict], data_type: str) -> Dict:
         """Save parsed records to database"""
         saved_count = 0
         errors = []
+        # Certificates and job cards are inserted together in one executemany
+        rows = []
         
         for record in records:
             try:
                 if data_type == "trains":
-                    await self._save_train(record)
+                    self._save_train(record)
                 elif data_type == "certificates":
-                    await self._save_certificate(record)
+                    rows.append(self._certificate_row(record))
                 elif data_type == "job-cards":
-                    await self._save_job_card(record)
+                    rows.append(self._job_card_row(record))
                 elif data_type == "branding":
-                    await self._save_branding(record)
+                    self._save_branding(record)
                 elif data_type == "mileage":
-                    await self._save_mileage(record)
+                    self._save_mileage(record)
                 elif data_type == "cleaning":
-                    await self._save_cleaning(record)
+                    self._save_cleaning(record)
                 saved_count += 1
             except Exception as e:
                 errors.append({"record": record, "error": str(e)})
         
+        if rows:
+            # render_nulls writes None as NULL, so the row builders must never
+            # leave None in a column that has a default
+            model = FitnessCertificate if data_type == "certificates" else JobCard
+            self.db.execute(insert(model).execution_options(render_nulls=True), rows)
         self.db.commit()
         
         return {
@@ -462,62 +527,57 @@ Response format (JSON array only, no explanation):
             "errors": errors[:5] if errors else []  # Return first 5 errors
         }
     
-    async def _save_train(self, data: Dict):
+    def _save_train(self, data: Dict):
         """Save train record"""
         train = Train(
             train_id=data.get('train_id', f"TS-{data.get('train_number', 0)}"),
             train_number=int(data.get('train_number', 0)),
             name=data.get('name', ''),
             configuration=data.get('configuration', '3-car'),
-            status=TrainStatus(data.get('status', 'active')),
+            status=TRAIN_STATUSES[data.get('status', 'active')],
             depot_id=data.get('depot_id', 'MUTTOM'),
             overall_health_score=float(data.get('overall_health_score', 100)),
             is_service_ready=data.get('status', 'active') == 'active'
         )
         self.db.add(train)
     
-    async def _save_certificate(self, data: Dict):
-        """Save certificate record"""
-        # Find train
-        train = self.db.query(Train).filter(
-            Train.train_id == data.get('train_id')
-        ).first()
-        
-        if not train:
-            raise ValueError(f"Train {data.get('train_id')} not found")
+    def _get_train_pk(self, train_code: str) -> int:
+        """Look up a train's database id from its TS-xxx code"""
+        train_pk = self.db.execute(_TRAIN_PK_BY_CODE, {"train_code": train_code}).scalar()
+        if not train_pk:
+            raise ValueError(f"Train {train_code} not found")
+        return train_pk
+    
+    def _certificate_row(self, data: Dict) -> Dict:
+        """Column values for a certificate record"""
+        train_pk = self._get_train_pk(data.get('train_id'))
         
-        cert = FitnessCertificate(
-            train_id=train.id,
+        return dict(
+            train_id=train_pk,
             certificate_number=data.get('certificate_number', f"CERT-{datetime.now().strftime('%Y%m%d%H%M%S')}"),
-            department=Department(data.get('department', 'RollingStock')),
-            status=CertificateStatus(data.get('status', 'Valid')),
-            criticality=Criticality(data.get('criticality', 'hard')),
+            department=DEPARTMENTS[data.get('department', 'RollingStock')],
+            status=CERTIFICATE_STATUSES[data.get('status', 'Valid')],
+            criticality=CRITICALITIES[data.get('criticality', 'hard')],
             valid_from=self._parse_date(data.get('valid_from')),
             valid_to=self._parse_date(data.get('valid_to')),
-            is_conditional=data.get('is_conditional', False),
+            is_conditional=self._parse_bool(data.get('is_conditional', False)),
             condition_notes=data.get('condition_notes'),
-            emergency_override=data.get('emergency_override', False),
+            emergency_override=self._parse_bool(data.get('emergency_override', False)),
             override_approved_by=data.get('override_approved_by'),
             override_reason=data.get('override_reason'),
             remarks=data.get('remarks', '')
         )
-        self.db.add(cert)
     
-    async def _save_job_card(self, data: Dict):
-        """Save job card record"""
-        train = self.db.query(Train).filter(
-            Train.train_id == data.get('train_id')
-        ).first()
-        
-        if not train:
-            raise ValueError(f"Train {data.get('train_id')} not found")
+    def _job_card_row(self, data: Dict) -> Dict:
+        """Column values for a job card record"""
+        train_pk = self._get_train_pk(data.get('train_id'))
         
-        job = JobCard(
-            train_id=train.id,
+        return dict(
+            train_id=train_pk,
             job_id=data.get('job_id', f"WO-{datetime.now().strftime('%Y%m%d%H%M%S')}"),
-            job_type=JobType(data.get('job_type', 'preventive')),
-            priority=JobPriority(int(data.get('priority', 3))),
-            status=JobStatus(data.get('status', 'OPEN')),
+            job_type=JOB_TYPES[data.get('job_type', 'preventive')],
+            priority=JOB_PRIORITIES[int(data.get('priority', 3))],
+            status=JOB_STATUSES[data.get('status', 'OPEN')],
             title=data.get('title', 'Maintenance Task'),
             description=data.get('description', ''),
             related_component=data.get('related_component', ''),
@@ -528,44 +588,33 @@ Response format (JSON array only, no explanation):
             estimated_downtime_hours=float(data.get('estimated_downtime_hours', 0)),
             parts_available=self._parse_bool(data.get('parts_available', True))
         )
-        self.db.add(job)
     
-    async def _save_branding(self, data: Dict):
+    def _save_branding(self, data: Dict):
         """Save branding contract"""
-        train = self.db.query(Train).filter(
-            Train.train_id == data.get('train_id')
-        ).first()
-        
-        if not train:
-            raise ValueError(f"Train {data.get('train_id')} not found")
+        train_pk = self._get_train_pk(data.get('train_id'))
         
         contract = BrandingContract(
-            train_id=train.id,
+            train_id=train_pk,
             brand_id=data.get('brand_id', f"BRAND-{datetime.now().strftime('%Y%m%d')}"),
             brand_name=data.get('brand_name', 'Unknown Brand'),
             campaign_name=data.get('campaign_name', ''),
             campaign_start=self._parse_date(data.get('campaign_start')),
             campaign_end=self._parse_date(data.get('campaign_end')),
-            priority=BrandingPriority(data.get('priority', 'silver')),
+            priority=BRANDING_PRIORITIES[data.get('priority', 'silver')],
             target_exposure_hours_weekly=float(data.get('target_exposure_hours_weekly', 50)),
             target_exposure_hours_monthly=float(data.get('target_exposure_hours_monthly', 200)),
             penalty_per_hour_shortfall=float(data.get('penalty_per_hour_shortfall', 100)),
-            required_time_band=TimeBand(data.get('required_time_band', 'all_day'))
+            required_time_band=TIME_BANDS[data.get('required_time_band', 'all_day')]
         )
         self.db.add(contract)
     
-    async def _save_mileage(self, data: Dict):
+    def _save_mileage(self, data: Dict):
         """Save mileage record"""
-        train = self.db.query(Train).filter(
-            Train.train_id == data.get('train_id')
-        ).first()
-        
-        if not train:
-            raise ValueError(f"Train {data.get('train_id')} not found")
+        train_pk = self._get_train_pk(data.get('train_id'))
         
         # Update existing or create new
         meter = self.db.query(MileageMeter).filter(
-            MileageMeter.train_id == train.id,
+            MileageMeter.train_id == train_pk,
             MileageMeter.component_type == 'train'
         ).first()
         
@@ -576,7 +625,7 @@ Response format (JSON array only, no explanation):
             meter.updated_at = datetime.utcnow()
         else:
             meter = MileageMeter(
-                train_id=train.id,
+                train_id=train_pk,
                 component_type='train',
                 lifetime_km=float(data.get('lifetime_km', 0)),
                 km_since_last_service=float(data.get('km_since_last_service', 0)),
@@ -587,17 +636,12 @@ Response format (JSON array only, no explanation):
             )
             self.db.add(meter)
     
-    async def _save_cleaning(self, data: Dict):
+    def _save_cleaning(self, data: Dict):
         """Save cleaning record"""
-        train = self.db.query(Train).filter(
-            Train.train_id == data.get('train_id')
-        ).first()
-        
-        if not train:
-            raise ValueError(f"Train {data.get('train_id')} not found")
+        train_pk = self._get_train_pk(data.get('train_id'))
         
         record = self.db.query(CleaningRecord).filter(
-            CleaningRecord.train_id == train.id
+            CleaningRecord.train_id == train_pk
         ).first()
         
         if record:
@@ -610,8 +654,8 @@ Response format (JSON array only, no explanation):
             record.update_status()
         else:
             record = CleaningRecord(
-                train_id=train.id,
-                status=CleaningStatus(data.get('status', 'ok')),
+                train_id=train_pk,
+                status=CLEANING_STATUSES[data.get('status', 'ok')],
                 last_cleaned_at=self._parse_date(data.get('last_cleaned_at')) or datetime.utcnow(),
                 special_clean_required=self._parse_bool(data.get('special_clean_required', False)),
                 special_clean_reason=data.get('special_clean_reason'),
@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 from typing import List, Dict
 import json
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from ..models import (
@@ -365,6 +366,7 @@ class MockDataGenerator:
         
         Realistic edge cases for demonstration.
         """
+        certificates = []
         for train in trains:
             for dept in Department:
                 # Different validity periods per department
@@ -482,7 +484,7 @@ class MockDataGenerator:
                 
                 inspector = random.choice(self.inspectors)
                 
-                certificate = FitnessCertificate(
+                certificates.append(dict(
                     train_id=train.id,
                     certificate_number=cert_num,
                     department=dept,
@@ -501,8 +503,11 @@ class MockDataGenerator:
                     inspector_name=inspector,
                     inspection_type=random.choice(["Scheduled", "Post-incident", "Special"]),
                     remarks=random.choice(remarks_options)
-                )
-                self.db.add(certificate)
+                ))
+        
+        # One executemany; no instances are needed back. render_nulls keeps
+        # every row's column set identical so the rows are not split into groups
+        self.db.execute(insert(FitnessCertificate).execution_options(render_nulls=True), certificates)
     
     def generate_job_cards(self, trains: List[Train]):
         """
@@ -553,6 +558,7 @@ class MockDataGenerator:
             ],
         }
         
+        jobs = []
         for train in trains:
             # Each train has 1-5 job cards
             num_jobs = random.randint(1, 5)
@@ -615,7 +621,7 @@ class MockDataGenerator:
                     if fault_codes_for_comp:
                         fault_code = random.choice(fault_codes_for_comp)
                 
-                job = JobCard(
+                jobs.append(dict(
                     train_id=train.id,
                     job_id=job_id,
                     job_type=template["type"],
@@ -646,8 +652,9 @@ class MockDataGenerator:
                     fault_description=f"Fault detected in {component} system" if fault_code else None,
                     fault_detected_by=random.choice(["Driver", "IoT sensor", "Inspection", "OCC"]),
                     assigned_team=f"{component.upper()} Maintenance Team"
-                )
-                self.db.add(job)
+                ))
+        
+        self.db.execute(insert(JobCard).execution_options(render_nulls=True), jobs)
     
     def generate_branding_contracts(self, trains: List[Train]):
         """
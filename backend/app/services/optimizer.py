@@ -8,6 +8,7 @@ from typing import List, Dict, Tuple, Optional
 import json
 
 from ortools.sat.python import cp_model
+from sqlalchemy import case, func, select, bindparam
 from sqlalchemy.orm import Session
 
 from ..models import (
@@ -22,6 +23,56 @@ from ..models import (
 )
 
 
+IBL_ASSIGNMENTS = ["IBL_MAINTENANCE", "IBL_CLEANING", "IBL_BOTH"]
+
+# Per-train lookups run once per train on every optimization. Built once at
+# import; the train id (and current time) are bound on each execution.
+_TRAIN_ID = bindparam("train_id")
+TRAIN_CERTIFICATES = select(FitnessCertificate).where(FitnessCertificate.train_id == _TRAIN_ID)
+TRAIN_OPEN_JOBS = select(JobCard).where(
+    JobCard.train_id == _TRAIN_ID,
+    JobCard.status.in_([JobStatus.OPEN, JobStatus.IN_PROGRESS, JobStatus.PENDING_PARTS])
+)
+TRAIN_ACTIVE_CONTRACTS = select(BrandingContract).where(
+    BrandingContract.train_id == _TRAIN_ID,
+    BrandingContract.campaign_end > bindparam("now")
+)
+TRAIN_MILEAGE_METER = select(MileageMeter).where(
+    MileageMeter.train_id == _TRAIN_ID,
+    MileageMeter.component_type == "train"
+).limit(1)
+TRAIN_CLEANING_RECORD = select(CleaningRecord).where(CleaningRecord.train_id == _TRAIN_ID).limit(1)
+TRAIN_POSITION = select(TrainPosition).where(TrainPosition.train_id == _TRAIN_ID).limit(1)
+
+
+def compute_plan_stats(db: Session, plan_ids) -> Dict[int, Dict[str, int]]:
+    """
+    Count assignments by category for each plan in one grouped query.
+    Returns {plan_id: {"in_service", "standby", "ibl", "out_of_service"}}.
+    """
+    # Use string comparison since SQLite stores enum as string
+    kind = PlanAssignment.assignment_type
+    rows = db.query(
+        PlanAssignment.plan_id,
+        func.count(case((kind == "SERVICE", 1))).label("in_service"),
+        func.count(case((kind == "STANDBY", 1))).label("standby"),
+        func.count(case((kind.in_(IBL_ASSIGNMENTS), 1))).label("ibl"),
+        func.count(case((kind == "OUT_OF_SERVICE", 1))).label("out_of_service"),
+    ).filter(
+        PlanAssignment.plan_id.in_(set(plan_ids))
+    ).group_by(PlanAssignment.plan_id)
+    
+    return {
+        row.plan_id: {
+            "in_service": row.in_service,
+            "standby": row.standby,
+            "ibl": row.ibl,
+            "out_of_service": row.out_of_service
+        }
+        for row in rows
+    }
+
+
 class TrainInductionOptimizer:
     """
     Multi-objective constraint optimizer for train induction planning.
@@ -189,9 +240,7 @@ class TrainInductionOptimizer:
     
     def _evaluate_fitness(self, train: Train, scores: Dict):
         """Evaluate fitness certificates"""
-        certs = self.db.query(FitnessCertificate).filter(
-            FitnessCertificate.train_id == train.id
-        ).all()
+        certs = self.db.scalars(TRAIN_CERTIFICATES, {"train_id": train.id}).all()
         
         # Need valid certs from all three departments
         dept_status = {dept: False for dept in Department}
@@ -200,19 +249,20 @@ class TrainInductionOptimizer:
             if cert.is_valid_at(self.now + timedelta(hours=24)):  # Valid for tomorrow
                 dept_status[cert.department] = True
             else:
+                hours_until_expiry = cert.hours_until_expiry(self.now)
                 scores["fitness_issues"].append({
                     "department": cert.department.value,
                     "status": cert.status.value,
-                    "hours_until_expiry": cert.hours_until_expiry()
+                    "hours_until_expiry": hours_until_expiry
                 })
                 
                 # Check if expiring during service window
-                if 0 < cert.hours_until_expiry() < 16:
+                if 0 < hours_until_expiry < 16:
                     self.alerts.append({
                         "train_id": train.id,
                         "severity": "warning",
                         "type": "certificate_expiring",
-                        "message": f"{cert.department.value} certificate expires in {cert.hours_until_expiry():.1f} hours"
+                        "message": f"{cert.department.value} certificate expires in {hours_until_expiry:.1f} hours"
                     })
         
         # Calculate fitness score
@@ -231,10 +281,7 @@ class TrainInductionOptimizer:
     
     def _evaluate_maintenance(self, train: Train, scores: Dict):
         """Evaluate job cards / maintenance status"""
-        jobs = self.db.query(JobCard).filter(
-            JobCard.train_id == train.id,
-            JobCard.status.in_([JobStatus.OPEN, JobStatus.IN_PROGRESS, JobStatus.PENDING_PARTS])
-        ).all()
+        jobs = self.db.scalars(TRAIN_OPEN_JOBS, {"train_id": train.id}).all()
         
         blocking_jobs = []
         ibl_required = False
@@ -253,13 +300,13 @@ class TrainInductionOptimizer:
                 })
             
             # Overdue jobs
-            if job.is_overdue():
+            if job.is_overdue(self.now):
                 score_deduction += 20
                 scores["maintenance_issues"].append({
                     "job_id": job.job_id,
                     "title": job.title,
                     "issue": "overdue",
-                    "days_overdue": -job.days_until_due()
+                    "days_overdue": -job.days_until_due(self.now)
                 })
             
             # Jobs requiring IBL
@@ -279,9 +326,8 @@ class TrainInductionOptimizer:
     
     def _evaluate_branding(self, train: Train, scores: Dict):
         """Evaluate branding contracts and SLA status"""
-        contracts = self.db.query(BrandingContract).filter(
-            BrandingContract.train_id == train.id,
-            BrandingContract.campaign_end > self.now
+        contracts = self.db.scalars(
+            TRAIN_ACTIVE_CONTRACTS, {"train_id": train.id, "now": self.now}
         ).all()
         
         if not contracts:
@@ -297,7 +343,7 @@ class TrainInductionOptimizer:
             scores["branding_contracts"].append({
                 "brand_name": contract.brand_name,
                 "priority": contract.priority.value,
-                "weekly_deficit": contract.get_weekly_deficit(),
+                "weekly_deficit": contract.weekly_deficit,
                 "urgency": urgency,
                 "penalty_rate": contract.penalty_per_hour_shortfall
             })
@@ -315,10 +361,7 @@ class TrainInductionOptimizer:
     
     def _evaluate_mileage(self, train: Train, scores: Dict):
         """Evaluate mileage and threshold proximity"""
-        meter = self.db.query(MileageMeter).filter(
-            MileageMeter.train_id == train.id,
-            MileageMeter.component_type == "train"
-        ).first()
+        meter = self.db.scalars(TRAIN_MILEAGE_METER, {"train_id": train.id}).first()
         
         if not meter:
             return
@@ -345,20 +388,19 @@ class TrainInductionOptimizer:
     
     def _evaluate_cleaning(self, train: Train, scores: Dict):
         """Evaluate cleaning status"""
-        record = self.db.query(CleaningRecord).filter(
-            CleaningRecord.train_id == train.id
-        ).first()
+        record = self.db.scalars(TRAIN_CLEANING_RECORD, {"train_id": train.id}).first()
         
         if not record:
             return
         
-        urgency = record.get_cleaning_urgency()
+        days = record.days_since_last_cleaning()
+        urgency = record.get_cleaning_urgency(days)
         
-        if record.is_cleaning_required():
+        if record.is_cleaning_required(days):
             scores["cleaning_required"] = True
             scores["cleaning_issues"].append({
                 "status": record.status.value,
-                "days_since_cleaning": record.days_since_last_cleaning(),
+                "days_since_cleaning": days,
                 "special_required": record.special_clean_required,
                 "vip_tomorrow": record.vip_inspection_tomorrow
             })
@@ -376,9 +418,7 @@ class TrainInductionOptimizer:
     
     def _evaluate_shunting(self, train: Train, scores: Dict):
         """Evaluate shunting cost based on position"""
-        position = self.db.query(TrainPosition).filter(
-            TrainPosition.train_id == train.id
-        ).first()
+        position = self.db.scalars(TRAIN_POSITION, {"train_id": train.id}).first()
         
         if not position:
             return
@@ -587,27 +627,11 @@ class TrainInductionOptimizer:
                     assignment.service_rank = rank
         
         # Update plan statistics by querying actual assignments
-        # Use string comparison since SQLite stores enum as string
-        plan.trains_in_service = self.db.query(PlanAssignment).filter(
-            PlanAssignment.plan_id == plan.id,
-            PlanAssignment.assignment_type == "SERVICE"
-        ).count()
-        plan.trains_standby = self.db.query(PlanAssignment).filter(
-            PlanAssignment.plan_id == plan.id,
-            PlanAssignment.assignment_type == "STANDBY"
-        ).count()
-        plan.trains_ibl = self.db.query(PlanAssignment).filter(
-            PlanAssignment.plan_id == plan.id,
-            PlanAssignment.assignment_type.in_([
-                "IBL_MAINTENANCE", 
-                "IBL_CLEANING",
-                "IBL_BOTH"
-            ])
-        ).count()
-        plan.trains_out_of_service = self.db.query(PlanAssignment).filter(
-            PlanAssignment.plan_id == plan.id,
-            PlanAssignment.assignment_type == "OUT_OF_SERVICE"
-        ).count()
+        stats = compute_plan_stats(self.db, [plan.id]).get(plan.id, {})
+        plan.trains_in_service = stats.get("in_service", 0)
+        plan.trains_standby = stats.get("standby", 0)
+        plan.trains_ibl = stats.get("ibl", 0)
+        plan.trains_out_of_service = stats.get("out_of_service", 0)
         
         # Assign service ranks for heuristic case too
         if not service_trains:
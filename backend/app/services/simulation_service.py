@@ -3,22 +3,20 @@ KMRL Train Simulation Service
 Simulates passenger handling and energy optimization with Groq-powered reasoning.
 """
 
+import importlib.util
 import json
 import math
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
+from functools import lru_cache
 
 from sqlalchemy.orm import Session
 
-# Groq
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
+# Groq - the client itself is built by config.get_groq_client
+GROQ_AVAILABLE = importlib.util.find_spec("groq") is not None
 
-from ..config import get_groq_api_key, is_groq_enabled
+from ..config import get_groq_api_key, get_groq_client, is_groq_enabled
 from ..models import (
     Train, TrainStatus, NightPlan, PlanAssignment,
     BrandingContract, BrandingPriority, TimeBand,
@@ -66,6 +64,20 @@ KMRL_STATIONS = [
 ]
 
 
+@lru_cache(maxsize=1)
+def _reasoning_client():
+    """Groq client for simulation reasoning, resolved once per process"""
+    if not (GROQ_AVAILABLE and is_groq_enabled() and get_groq_api_key()):
+        return None
+    try:
+        client = get_groq_client()
+        print("✓ Groq initialized for simulation reasoning")
+        return client
+    except Exception as e:
+        print(f"✗ Groq init failed: {e}")
+        return None
+
+
 class SimulationService:
     """
     Advanced simulation service for KMRL operations.
@@ -88,20 +100,13 @@ class SimulationService:
     AVG_SPEED_KMH = 33
     DWELL_TIME_SECONDS = 25
     
+    # Static route data, shared by every instance
+    stations = KMRL_STATIONS
+    
     def __init__(self, db: Session):
+        # Built per request, so keep this to the session plus process-wide state
         self.db = db
-        self.groq_client = None
-        self.stations = KMRL_STATIONS
-        
-        # Initialize Groq
-        if GROQ_AVAILABLE and is_groq_enabled():
-            api_key = get_groq_api_key()
-            if api_key:
-                try:
-                    self.groq_client = Groq(api_key=api_key)
-                    print("✓ Groq initialized for simulation reasoning")
-                except Exception as e:
-                    print(f"✗ Groq init failed: {e}")
+        self.groq_client = _reasoning_client()
     
     async def run_passenger_simulation(self, params: Dict) -> Dict:
         """
@@ -794,8 +799,10 @@ with {energy['optimization_potential']['potential_savings_percent']}% energy opt
             "generated_at": datetime.utcnow().isoformat()
         }
     
-    def get_station_list(self) -> List[Dict]:
-        """Get list of all stations"""
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_station_list() -> List[Dict]:
+        """Get list of all stations (static data, built once)"""
         return [
             {
                 "name": s.name,
@@ -803,7 +810,7 @@ with {energy['optimization_potential']['potential_savings_percent']}% energy opt
                 "avg_daily_boarding": s.avg_boarding * 16,  # 16 operating hours
                 "peak_multiplier": s.peak_multiplier
             }
-            for s in self.stations
+            for s in KMRL_STATIONS
         ]
 
     # =====================================================
@@ -1197,6 +1204,7 @@ Average compliance projected at **{summary['average_compliance']:.1f}%** with ne
         """Build current depot state representation"""
         
         train_map = {t.id: t for t in trains}
+        track_codes = {t.id: t.track_id for t in tracks}
         
         depot_state = {
             "tracks": {},
@@ -1221,11 +1229,7 @@ Average compliance projected at **{summary['average_compliance']:.1f}%** with ne
         for pos in positions:
             train = train_map.get(pos.train_id)
             if train:
-                track_id = None
-                for t in tracks:
-                    if t.id == pos.track_id:
-                        track_id = t.track_id
-                        break
+                track_id = track_codes.get(pos.track_id)
                 
                 if track_id and track_id in depot_state["tracks"]:
                     depot_state["tracks"][track_id]["trains"].append({
@@ -27,7 +27,7 @@ import {
   getCleaningRecords,
   generateMockData
 } from '../services/api'
-import api from '../services/api'
+import api, { getUploadStatus } from '../services/api'
 import { useDepot } from '../contexts/DepotContext'
 
 const getTabs = (t) => [
@@ -703,6 +703,28 @@ function IntelligentUploadModal({ isOpen, onClose, onUpload, dataType }) {
   const [storeInCloud, setStoreInCloud] = useState(true)
   const [useIntelligent, setUseIntelligent] = useState(true)
 
+  // Cloudinary archiving runs after the upload responds; poll until it settles
+  const storageJobId = result?.storage?.status === 'queued' ? result.storage.job_id : null
+  useEffect(() => {
+    if (!storageJobId) return
+    const timer = setInterval(async () => {
+      try {
+        const { data } = await getUploadStatus(storageJobId)
+        if (data.status === 'queued') return
+        setResult(prev => prev && {
+          ...prev,
+          storage: data,
+          file_stored: data.status === 'stored',
+          cloudinary_url: data.cloudinary_url || null
+        })
+      } catch {
+        // Unknown/expired job - stop polling
+        setResult(prev => prev && { ...prev, storage: { ...prev.storage, status: 'unknown' } })
+      }
+    }, 2000)
+    return () => clearInterval(timer)
+  }, [storageJobId])
+
   const sampleFormats = {
     trains: 'train_id,train_number,name,configuration,status,depot_id\nTS-201,1,Trainset 1,3-car,active,MUTTOM',
     certificates: 'train_id,department,status,valid_from,valid_to,remarks\nTS-201,RollingStock,Valid,2024-01-01,2024-12-31,All systems nominal',
@@ -892,6 +914,12 @@ function IntelligentUploadModal({ isOpen, onClose, onUpload, dataType }) {
                   {result.cloudinary_url && (
                     <p>☁️ File stored: <a href={result.cloudinary_url} target="_blank" rel="noopener noreferrer" className="text-blue-400 hover:underline">View in Cloudinary</a></p>
                   )}
+                  {result.storage?.status === 'queued' && (
+                    <p>☁️ Storing file in Cloudinary...</p>
+                  )}
+                  {result.storage?.status === 'failed' && (
+                    <p className="text-amber-400">☁️ Cloudinary storage failed: {result.storage.error}</p>
+                  )}
                   {result.parsing_method && (
                     <p>🤖 Method: {result.parsing_method}</p>
                   )}
@@ -146,6 +146,9 @@ export const previewFileParsing = (file, dataType) => {
 export const getUploadSchema = (dataType) =>
   api.get(`/upload/schema/${dataType}`)
 
+export const getUploadStatus = (jobId) =>
+  api.get(`/upload/status/${jobId}`)
+
 // Alerts
 export const getAlerts = (params = {}) => api.get('/alerts', { params })
 export const acknowledgeAlert = (id, acknowledgedBy) => 